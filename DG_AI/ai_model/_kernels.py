@@ -0,0 +1,207 @@
+"""
+DrainGuard AI - Inference Kernels
+Per-reading feature update and scaling, plus Isolation Forest scoring over
+flattened tree arrays, compiled with Numba when it is installed.
+
+Without Numba the feature kernels run as plain Python over the NumPy state
+arrays; forest scoring is then left to scikit-learn (see HAVE_NUMBA).
+"""
+
+import math
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # Numba is optional
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Column order of the feature vector (shared with train_model.engineer_features)
+FEATURE_NAMES = (
+    "water_level_cm",
+    "gas_level",
+    "water_rolling_mean",
+    "water_rolling_std",
+    "gas_rolling_mean",
+    "gas_rolling_std",
+    "water_delta",
+    "gas_delta",
+    "water_gas_ratio",
+)
+
+# Slots of the rolling-window state vector passed to update_features
+STATE_HEAD = 0
+STATE_COUNT = 1
+STATE_WATER_SUM = 2
+STATE_WATER_SQSUM = 3
+STATE_GAS_SUM = 4
+STATE_GAS_SQSUM = 5
+STATE_WATER_PREV = 6
+STATE_GAS_PREV = 7
+STATE_SIZE = 8
+
+
+def new_state():
+    """Return an empty rolling-window state vector."""
+    state = np.zeros(STATE_SIZE, dtype=np.float64)
+    state[STATE_WATER_PREV] = np.nan
+    state[STATE_GAS_PREV] = np.nan
+    return state
+
+
+@njit(cache=True)
+def update_features(water_ring, gas_ring, state, water, gas, out):
+    """
+    Push one reading into the rolling window and write its raw features.
+
+    water_ring / gas_ring are the window's ring buffers and state holds the
+    head index, fill count, running sums and previous reading (all float64,
+    mutated in place; see new_state). out receives the features in
+    FEATURE_NAMES order.
+    """
+    window = water_ring.shape[0]
+    head = int(state[STATE_HEAD])
+    n = int(state[STATE_COUNT])
+
+    # Evict the value about to be overwritten from the running sums
+    if n == window:
+        old_water = water_ring[head]
+        old_gas = gas_ring[head]
+        state[STATE_WATER_SUM] -= old_water
+        state[STATE_WATER_SQSUM] -= old_water * old_water
+        state[STATE_GAS_SUM] -= old_gas
+        state[STATE_GAS_SQSUM] -= old_gas * old_gas
+    else:
+        n += 1
+
+    water_ring[head] = water
+    gas_ring[head] = gas
+    state[STATE_HEAD] = (head + 1) % window
+    state[STATE_COUNT] = n
+    state[STATE_WATER_SUM] += water
+    state[STATE_WATER_SQSUM] += water * water
+    state[STATE_GAS_SUM] += gas
+    state[STATE_GAS_SQSUM] += gas * gas
+
+    water_mean = state[STATE_WATER_SUM] / n
+    gas_mean = state[STATE_GAS_SUM] / n
+    water_std = 0.0
+    gas_std = 0.0
+    if n > 1:
+        # Sample (ddof=1) std to match pandas; clamp tiny negative round-off
+        water_std = math.sqrt(max(state[STATE_WATER_SQSUM] - state[STATE_WATER_SUM] * water_mean, 0.0) / (n - 1))
+        gas_std = math.sqrt(max(state[STATE_GAS_SQSUM] - state[STATE_GAS_SUM] * gas_mean, 0.0) / (n - 1))
+
+    # Previous reading starts as NaN: the first reading's deltas are 0
+    water_delta = 0.0
+    gas_delta = 0.0
+    if not math.isnan(state[STATE_WATER_PREV]):
+        water_delta = water - state[STATE_WATER_PREV]
+        gas_delta = gas - state[STATE_GAS_PREV]
+    state[STATE_WATER_PREV] = water
+    state[STATE_GAS_PREV] = gas
+
+    out[0] = water
+    out[1] = gas
+    out[2] = water_mean
+    out[3] = water_std
+    out[4] = gas_mean
+    out[5] = gas_std
+    out[6] = water_delta
+    out[7] = gas_delta
+    out[8] = water / max(gas, 1.0)
+
+
+@njit(cache=True)
+def scale_features(raw, order, mean, inv_scale, out):
+    """Write (raw[order[j]] - mean[j]) * inv_scale[j] into out[j] (model column order)."""
+    for j in range(order.shape[0]):
+        out[j] = (raw[order[j]] - mean[j]) * inv_scale[j]
+
+
+def _average_path_length(n_samples):
+    """Average isolation depth of n_samples points (c(n) in the Isolation Forest paper)."""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    out = np.zeros_like(n_samples)
+    out[n_samples == 2] = 1.0
+    big = n_samples > 2
+    out[big] = (2.0 * (np.log(n_samples[big] - 1.0) + np.euler_gamma)
+                - 2.0 * (n_samples[big] - 1.0) / n_samples[big])
+    return out
+
+
+def pack_forest(model):
+    """
+    Flatten a fitted IsolationForest into struct-of-arrays form for score_forest.
+
+    Nodes of all trees are concatenated; child indices point into the combined
+    arrays and are -1 at leaves. Thresholds are stored as float32, rounded down
+    so that x <= threshold gives the same split as scikit-learn for float32 x.
+    Each leaf carries its full path length (depth + c(leaf samples)).
+
+    Returns:
+        tuple (roots, feature, threshold, left, right, leaf_depth, denominator, offset)
+    """
+    n_features = model.n_features_in_
+    subsample = getattr(model, "_max_features", n_features) != n_features
+
+    roots, features, thresholds, lefts, rights, leaf_depths = [], [], [], [], [], []
+    base = 0
+    for tree, tree_features in zip(model.estimators_, model.estimators_features_):
+        t = tree.tree_
+        left = t.children_left.astype(np.int32)
+        right = t.children_right.astype(np.int32)
+        is_leaf = left < 0
+
+        depth = np.zeros(t.node_count, dtype=np.float64)
+        for node in range(t.node_count):  # children always follow their parent
+            if not is_leaf[node]:
+                depth[left[node]] = depth[node] + 1.0
+                depth[right[node]] = depth[node] + 1.0
+
+        feature = t.feature.astype(np.int32)
+        if subsample:
+            feature = np.where(is_leaf, feature, np.asarray(tree_features)[np.maximum(feature, 0)])
+
+        threshold = t.threshold.astype(np.float32)
+        too_high = threshold.astype(np.float64) > t.threshold
+        threshold[too_high] = np.nextafter(threshold[too_high], np.float32(-np.inf))
+
+        roots.append(base)
+        features.append(feature)
+        thresholds.append(threshold)
+        lefts.append(np.where(is_leaf, -1, left + base).astype(np.int32))
+        rights.append(np.where(is_leaf, -1, right + base).astype(np.int32))
+        leaf_depths.append(depth + _average_path_length(t.n_node_samples))
+        base += t.node_count
+
+    denominator = len(model.estimators_) * _average_path_length([model.max_samples_])[0]
+    return (np.array(roots, dtype=np.int64), np.concatenate(features),
+            np.concatenate(thresholds), np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(leaf_depths), float(denominator), float(model.offset_))
+
+
+@njit(cache=True)
+def score_forest(X, roots, feature, threshold, left, right, leaf_depth, denominator, offset, out):
+    """Write the IsolationForest decision_function of each row of float32 X into out."""
+    for i in range(X.shape[0]):
+        depth = 0.0
+        for t in range(roots.shape[0]):
+            node = roots[t]
+            while left[node] >= 0:
+                if X[i, feature[node]] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            depth += leaf_depth[node]
+        # score_samples is -2^(-depth / denominator); sklearn uses 2^-1 when it is 0
+        score = 0.5
+        if denominator > 0.0:
+            score = 2.0 ** (-depth / denominator)
+        out[i] = -score - offset
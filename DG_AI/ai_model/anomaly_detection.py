@@ -4,34 +4,67 @@ Loads the trained Isolation Forest model and provides real-time anomaly predicti
 """
 
 import os
+import bisect
 import time
 import logging
 import numpy as np
-import pandas as pd
 import joblib
-from collections import deque
 
 
 from config.settings import (
     MODEL_PATH,
     FEATURE_ROLLING_WINDOW,
     ANOMALY_COOLDOWN_SECONDS,
+    INFERENCE_N_JOBS,
+    INFERENCE_PARALLEL_MIN_BATCH,
     WATER_BLOCKAGE_THRESHOLD,
     WATER_LEAKAGE_THRESHOLD,
     GAS_DANGER_THRESHOLD,
     GAS_WARNING_THRESHOLD,
     RISK_LEVELS,
 )
+from ai_model._kernels import (
+    FEATURE_NAMES,
+    HAVE_NUMBA,
+    STATE_COUNT,
+    new_state,
+    update_features,
+    scale_features,
+    pack_forest,
+    score_forest,
+)
 
 logger = logging.getLogger(__name__)
 
+# Risk buckets flattened once into sorted lower bounds for bisect lookup
+_RISK_BUCKETS = sorted((config["min_score"], level) for level, config in RISK_LEVELS.items())
+_RISK_THRESH = tuple(min_score for min_score, _ in _RISK_BUCKETS)
+_RISK_NAMES = tuple(level for _, level in _RISK_BUCKETS)
+
+# Anomaly type by (water_bin, gas_bin):
+#   water_bin: 0 = below blockage, 1 = normal band, 2 = above leakage
+#   gas_bin:   0 = ok, 1 = above warning, 2 = above danger
+_RISK_TYPE_LUT = (
+    ("BLOCKAGE", "FLOOD_RISK", "FLOOD_RISK"),
+    ("BLOCKAGE", "GAS_HAZARD", "GAS_HAZARD"),
+    ("LEAKAGE", "LEAKAGE", "LEAKAGE"),
+)
+
 
 class AnomalyDetector:
     """Real-time anomaly detection using trained Isolation Forest."""
 
     def __init__(self, model_path=MODEL_PATH):
         self._load_model(model_path)
-        self._history = deque(maxlen=FEATURE_ROLLING_WINDOW * 2)
+
+        # Rolling window state: fixed-size ring buffers plus running sums so
+        # the rolling mean/std are updated in O(1) per reading. All of it is
+        # held in NumPy arrays so the feature kernel can update it in place.
+        self._water_ring = np.empty(self._rolling_window, dtype=np.float64)
+        self._gas_ring = np.empty(self._rolling_window, dtype=np.float64)
+        self._window_state = new_state()
+        self._features = np.empty(len(FEATURE_NAMES), dtype=np.float64)
+        self._readings_seen = 0
         self._last_alert_time = 0
         self._alert_count = 0
 
@@ -44,6 +77,7 @@ class AnomalyDetector:
             self._score_threshold = -0.1
             self._rolling_window = FEATURE_ROLLING_WINDOW
             self._feature_names = []
+            self._forest = None
             return
 
         package = joblib.load(model_path)
@@ -52,6 +86,21 @@ class AnomalyDetector:
         self._feature_names = package["feature_names"]
         self._rolling_window = package["rolling_window"]
         self._score_threshold = package.get("score_threshold", -0.1)
+
+        # Fold the StandardScaler into precomputed vectors and reuse scratch
+        # buffers so single-sample scoring does not allocate per reading.
+        n_features = len(self._feature_names)
+        mean = self._scaler.mean_ if self._scaler.mean_ is not None else np.zeros(n_features)
+        scale = self._scaler.scale_ if self._scaler.scale_ is not None else np.ones(n_features)
+        self._scaler_mean = np.asarray(mean, dtype=np.float64)
+        self._scaler_inv_scale = 1.0 / np.asarray(scale, dtype=np.float64)
+        # Position of each model column in the kernel's FEATURE_NAMES vector
+        self._feature_order = np.array([FEATURE_NAMES.index(name) for name in self._feature_names],
+                                       dtype=np.int64)
+        # float32 matches the training matrix and what the trees consume
+        self._X_scaled = np.empty((1, n_features), dtype=np.float32)
+        # Flattened trees for the compiled scorer; scikit-learn scores without Numba
+        self._forest = pack_forest(self._model) if HAVE_NUMBA else None
         logger.info(f"Model loaded from {model_path}")
 
     def predict(self, water_level: float, gas_level: float) -> dict:
@@ -62,19 +111,83 @@ class AnomalyDetector:
             dict with keys: is_anomaly, risk_score, risk_level, risk_type,
                            confidence, details
         """
-        # Add to history
-        self._history.append({"water_level_cm": water_level, "gas_level": gas_level})
-
-        # Build features
-        features = self._build_features(water_level, gas_level)
+        # Build features (also updates the rolling window)
+        features = self._build_features(water_level, gas_level, self._features)
 
         # Model prediction
-        if self._model is not None and len(self._history) >= 3:
-            result = self._model_predict(features)
+        if self._model is not None and self._readings_seen >= 3:
+            result = self._model_predict(features, water_level, gas_level)
         else:
             result = self._rule_based_predict(water_level, gas_level)
 
-        # Apply cooldown
+        return self._apply_cooldown(result)
+
+    def predict_batch(self, readings) -> list:
+        """
+        Predict anomaly status for several readings in arrival order.
+
+        Features are built sequentially (the rolling window is stateful), but
+        the Isolation Forest is scored once over the whole batch.
+
+        Args:
+            readings: sequence of dicts with water_level_cm and gas_level keys
+
+        Returns:
+            list of result dicts, one per reading (same keys as predict)
+        """
+        if len(readings) == 1:
+            reading = readings[0]
+            return [self.predict(reading["water_level_cm"], reading["gas_level"])]
+
+        results = [None] * len(readings)
+        model_rows = []
+        features = np.empty((len(readings), len(FEATURE_NAMES)), dtype=np.float64)
+
+        for i, reading in enumerate(readings):
+            water_level = reading["water_level_cm"]
+            gas_level = reading["gas_level"]
+            self._build_features(water_level, gas_level, features[i])
+            if self._model is not None and self._readings_seen >= 3:
+                model_rows.append(i)
+            else:
+                results[i] = self._rule_based_predict(water_level, gas_level)
+
+        if model_rows:
+            X = features[model_rows][:, self._feature_order]
+            X -= self._scaler_mean
+            X *= self._scaler_inv_scale
+            raw_scores = self._score_batch(X.astype(np.float32))
+            for i, raw_score in zip(model_rows, raw_scores):
+                reading = readings[i]
+                results[i] = self._build_result(reading["water_level_cm"], reading["gas_level"],
+                                                raw_score, raw_score < 0)
+
+        return [self._apply_cooldown(result) for result in results]
+
+    def _score_batch(self, X):
+        """
+        Return decision_function scores for a scaled feature matrix.
+
+        Negative scores are anomalies: IsolationForest.predict applies the same
+        cut, so calling it as well would only walk the trees a second time.
+        Large batches are parallelized across trees.
+        """
+        # The compiled scorer is single-threaded: best for live-sized batches
+        if self._forest is not None and len(X) < INFERENCE_PARALLEL_MIN_BATCH:
+            raw_scores = np.empty(len(X), dtype=np.float64)
+            score_forest(X, *self._forest, raw_scores)
+            return raw_scores
+
+        if len(X) < INFERENCE_PARALLEL_MIN_BATCH:
+            return self._model.decision_function(X)
+
+        # IsolationForest ignores its own n_jobs at predict time; tree scoring
+        # only parallelizes under an explicit joblib backend (threads share X).
+        with joblib.parallel_config(backend="threading", n_jobs=INFERENCE_N_JOBS):
+            return self._model.decision_function(X)
+
+    def _apply_cooldown(self, result):
+        """Flag alerts raised within the cooldown window as suppressed."""
         result["alert_suppressed"] = False
         if result["is_anomaly"]:
             now = time.time()
@@ -86,48 +199,33 @@ class AnomalyDetector:
 
         return result
 
-    def _build_features(self, water_level, gas_level):
-        """Build feature vector from current reading + history."""
-        history_df = pd.DataFrame(list(self._history))
-
-        window = min(len(history_df), self._rolling_window)
-
-        features = {
-            "water_level_cm": water_level,
-            "gas_level": gas_level,
-            "water_rolling_mean": history_df["water_level_cm"].tail(window).mean(),
-            "water_rolling_std": history_df["water_level_cm"].tail(window).std() if window > 1 else 0,
-            "gas_rolling_mean": history_df["gas_level"].tail(window).mean(),
-            "gas_rolling_std": history_df["gas_level"].tail(window).std() if window > 1 else 0,
-            "water_delta": water_level - history_df["water_level_cm"].iloc[-2] if len(history_df) > 1 else 0,
-            "gas_delta": gas_level - history_df["gas_level"].iloc[-2] if len(history_df) > 1 else 0,
-            "water_gas_ratio": water_level / max(gas_level, 1),
-        }
-
-        return features
+    def _build_features(self, water_level, gas_level, out):
+        """Update the rolling window with the current reading and write its features into out."""
+        update_features(self._water_ring, self._gas_ring, self._window_state,
+                        float(water_level), float(gas_level), out)
+        self._readings_seen += 1
+        return out
 
-    def _model_predict(self, features):
+    def _model_predict(self, features, water_level, gas_level):
         """Use trained Isolation Forest for prediction."""
-        # Create feature array in correct order
-        X = np.array([[features[name] for name in self._feature_names]])
-        X_scaled = self._scaler.transform(X)
+        # Scale straight into the scratch row, in model column order
+        X_scaled = self._X_scaled
+        scale_features(features, self._feature_order, self._scaler_mean,
+                       self._scaler_inv_scale, X_scaled[0])
 
         # Get anomaly score
-        raw_score = self._model.decision_function(X_scaled)[0]
-        prediction = self._model.predict(X_scaled)[0]  # 1 = normal, -1 = anomaly
+        raw_score = self._score_batch(X_scaled)[0]
 
-        is_anomaly = prediction == -1
+        return self._build_result(water_level, gas_level, raw_score, raw_score < 0)
 
+    def _build_result(self, water_level, gas_level, raw_score, is_anomaly):
+        """Turn an Isolation Forest score into the prediction result dict."""
         # Convert score to 0-100 risk percentage
         # Lower decision_function scores = more anomalous
         risk_score = self._score_to_risk(raw_score)
 
         # Determine risk type
-        risk_type = self._classify_risk_type(
-            features["water_level_cm"],
-            features["gas_level"],
-            is_anomaly
-        )
+        risk_type = self._classify_risk_type(water_level, gas_level, is_anomaly)
 
         # Determine risk level
         risk_level = self._get_risk_level(risk_score)
@@ -139,7 +237,7 @@ class AnomalyDetector:
             "risk_type": risk_type,
             "confidence": round(min(abs(raw_score) * 100, 99), 1),
             "raw_score": round(raw_score, 4),
-            "details": self._generate_details(risk_type, features, risk_score),
+            "details": self._generate_details(risk_type, water_level, gas_level, risk_score),
         }
 
     def _rule_based_predict(self, water_level, gas_level):
@@ -187,7 +285,7 @@ class AnomalyDetector:
             "risk_type": risk_type,
             "confidence": 60.0,  # Lower confidence for rule-based
             "raw_score": 0,
-            "details": self._generate_details(risk_type, {"water_level_cm": water_level, "gas_level": gas_level}, risk_score),
+            "details": self._generate_details(risk_type, water_level, gas_level, risk_score),
         }
 
     def _score_to_risk(self, raw_score):
@@ -206,49 +304,42 @@ class AnomalyDetector:
         if not is_anomaly:
             return "NORMAL"
 
-        if water_level < WATER_BLOCKAGE_THRESHOLD:
-            if gas_level > GAS_WARNING_THRESHOLD:
-                return "FLOOD_RISK"
-            return "BLOCKAGE"
-        elif water_level > WATER_LEAKAGE_THRESHOLD:
-            return "LEAKAGE"
-        elif gas_level > GAS_DANGER_THRESHOLD:
-            return "GAS_HAZARD"
-        elif gas_level > GAS_WARNING_THRESHOLD:
-            return "GAS_HAZARD"
-        else:
-            return "BLOCKAGE"  # Default anomaly type
+        # int() keeps the sum arithmetic for NumPy scalars (np.bool + np.bool is OR)
+        water_bin = int(water_level >= WATER_BLOCKAGE_THRESHOLD) + int(water_level > WATER_LEAKAGE_THRESHOLD)
+        gas_bin = int(gas_level > GAS_WARNING_THRESHOLD) + int(gas_level > GAS_DANGER_THRESHOLD)
+        return _RISK_TYPE_LUT[water_bin][gas_bin]
 
     def _get_risk_level(self, risk_score):
         """Map risk score to risk level label."""
-        for level, config in RISK_LEVELS.items():
-            if config["min_score"] <= risk_score < config["max_score"]:
-                return level
-        return "CRITICAL"
+        idx = bisect.bisect_right(_RISK_THRESH, risk_score) - 1
+        if idx < 0:
+            return "CRITICAL"
+        return _RISK_NAMES[idx]
 
-    def _generate_details(self, risk_type, features, risk_score):
+    def _generate_details(self, risk_type, water, gas, risk_score):
         """Generate human-readable details about the detected condition."""
-        water = features.get("water_level_cm", 0)
-        gas = features.get("gas_level", 0)
-
-        messages = {
-            "NORMAL": f"System operating normally. Water: {water:.1f}cm, Gas: {gas}",
-            "BLOCKAGE": f"Potential blockage detected. Water level critically low at {water:.1f}cm, "
-                       f"indicating high water in drain pipe. Immediate inspection recommended.",
-            "LEAKAGE": f"Possible leakage detected. Water level at {water:.1f}cm is abnormally high "
-                      f"(low water in drain), suggesting pipe damage or unauthorized discharge.",
-            "GAS_HAZARD": f"Hazardous gas concentration detected at {gas} ADC units. "
-                         f"Ventilation required before personnel entry. Risk score: {risk_score:.0f}%.",
-            "FLOOD_RISK": f"Flood risk condition. Water level at {water:.1f}cm with elevated gas at {gas}. "
-                         f"Drain capacity may be exceeded. Alert municipal flood response team.",
-        }
-
-        return messages.get(risk_type, f"Anomalous condition detected. Water: {water:.1f}cm, Gas: {gas}")
+        # Format only the selected message
+        if risk_type == "NORMAL":
+            return f"System operating normally. Water: {water:.1f}cm, Gas: {gas}"
+        elif risk_type == "BLOCKAGE":
+            return (f"Potential blockage detected. Water level critically low at {water:.1f}cm, "
+                    f"indicating high water in drain pipe. Immediate inspection recommended.")
+        elif risk_type == "LEAKAGE":
+            return (f"Possible leakage detected. Water level at {water:.1f}cm is abnormally high "
+                    f"(low water in drain), suggesting pipe damage or unauthorized discharge.")
+        elif risk_type == "GAS_HAZARD":
+            return (f"Hazardous gas concentration detected at {gas} ADC units. "
+                    f"Ventilation required before personnel entry. Risk score: {risk_score:.0f}%.")
+        elif risk_type == "FLOOD_RISK":
+            return (f"Flood risk condition. Water level at {water:.1f}cm with elevated gas at {gas}. "
+                    f"Drain capacity may be exceeded. Alert municipal flood response team.")
+        else:
+            return f"Anomalous condition detected. Water: {water:.1f}cm, Gas: {gas}"
 
     @property
     def stats(self):
         return {
             "model_loaded": self._model is not None,
-            "history_length": len(self._history),
+            "history_length": int(self._window_state[STATE_COUNT]),
             "total_alerts": self._alert_count,
         }
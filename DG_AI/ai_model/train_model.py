@@ -20,11 +20,51 @@ from config.settings import (
     ISOLATION_FOREST_CONTAMINATION,
     FEATURE_ROLLING_WINDOW,
 )
+from ai_model._kernels import FEATURE_NAMES
 
+# Columns read from the training CSV. Water stays float64: rounding it to
+# float32 would shift the engineered features and change the trained model.
+TRAINING_DTYPES = {
+    "water_level_cm": np.float64,
+    "gas_level": np.int16,  # 12-bit ADC
+    "is_anomaly": np.int8,
+}
 
-def engineer_features(df: pd.DataFrame, window: int = FEATURE_ROLLING_WINDOW) -> pd.DataFrame:
+
+def _rolling_mean_std(values: np.ndarray, window: int) -> tuple:
+    """
+    Trailing rolling mean and sample std (ddof=1) in O(n) via cumulative sums.
+
+    Matches pandas rolling(window, min_periods=1) semantics, with the std of
+    single-sample windows reported as 0.
+    """
+    x = values.astype(np.float64) - values.mean()  # centre to limit cancellation
+    csum = np.concatenate(([0.0], np.cumsum(x)))
+    csq = np.concatenate(([0.0], np.cumsum(x * x)))
+
+    end = np.arange(1, len(x) + 1)
+    start = np.maximum(end - window, 0)
+    count = end - start
+
+    win_sum = csum[end] - csum[start]
+    win_sq = csq[end] - csq[start]
+    mean = win_sum / count
+
+    var = np.zeros(len(x))
+    multi = count > 1
+    var[multi] = (win_sq[multi] - win_sum[multi] * mean[multi]) / (count[multi] - 1)
+    std = np.sqrt(np.maximum(var, 0.0))
+
+    return mean + values.mean(), std
+
+
+def engineer_features(df: pd.DataFrame, window: int = FEATURE_ROLLING_WINDOW) -> np.ndarray:
     """
     Create time-series features from raw sensor data.
+
+    Returns a contiguous float32 matrix of shape (len(df), len(FEATURE_NAMES)),
+    columns in FEATURE_NAMES order. Sensor readings carry far less than
+    float64 precision, and the Isolation Forest trees work in float32 anyway.
     
     Features:
     - water_level_cm, gas_level (raw)
@@ -34,27 +74,25 @@ def engineer_features(df: pd.DataFrame, window: int = FEATURE_ROLLING_WINDOW) ->
     - gas_delta
     - water_gas_ratio (interaction term)
     """
-    features = pd.DataFrame()
+    water = df["water_level_cm"].to_numpy(dtype=np.float64)
+    gas = df["gas_level"].to_numpy(dtype=np.float64)
 
-    features["water_level_cm"] = df["water_level_cm"]
-    features["gas_level"] = df["gas_level"]
+    out = np.empty((len(df), len(FEATURE_NAMES)), dtype=np.float32)
+    out[:, 0] = water
+    out[:, 1] = gas
 
     # Rolling statistics
-    features["water_rolling_mean"] = df["water_level_cm"].rolling(window, min_periods=1).mean()
-    features["water_rolling_std"] = df["water_level_cm"].rolling(window, min_periods=1).std().fillna(0)
-    features["gas_rolling_mean"] = df["gas_level"].rolling(window, min_periods=1).mean()
-    features["gas_rolling_std"] = df["gas_level"].rolling(window, min_periods=1).std().fillna(0)
+    out[:, 2], out[:, 3] = _rolling_mean_std(water, window)
+    out[:, 4], out[:, 5] = _rolling_mean_std(gas, window)
 
     # Rate of change (delta)
-    features["water_delta"] = df["water_level_cm"].diff().fillna(0)
-    features["gas_delta"] = df["gas_level"].diff().fillna(0)
+    out[:, 6] = np.diff(water, prepend=water[:1])
+    out[:, 7] = np.diff(gas, prepend=gas[:1])
 
     # Interaction feature
-    features["water_gas_ratio"] = (
-        df["water_level_cm"] / (df["gas_level"].replace(0, 1))
-    )
+    out[:, 8] = water / np.where(gas == 0, 1, gas)
 
-    return features
+    return out
 
 
 def train_model():
@@ -65,18 +103,24 @@ def train_model():
 
     # Load data
     print(f"\n[1/4] Loading data from {SENSOR_DATA_CSV}...")
-    df = pd.read_csv(SENSOR_DATA_CSV)
+    df = pd.read_csv(
+        SENSOR_DATA_CSV,
+        engine="c",
+        memory_map=True,
+        usecols=list(TRAINING_DTYPES),
+        dtype=TRAINING_DTYPES,
+    )
     print(f"      Loaded {len(df)} samples ({df['is_anomaly'].sum()} labeled anomalies)")
 
     # Feature engineering
     print("[2/4] Engineering features...")
     features = engineer_features(df)
-    feature_names = list(features.columns)
+    feature_names = list(FEATURE_NAMES)
     print(f"      Features: {feature_names}")
 
     # Scale features
     scaler = StandardScaler()
-    X = scaler.fit_transform(features.values)
+    X = scaler.fit_transform(features)
 
     # Train Isolation Forest
     print(f"[3/4] Training IsolationForest (n_estimators={ISOLATION_FOREST_ESTIMATORS}, "
@@ -0,0 +1,87 @@
+"""
+DrainGuard AI - Simulator Kernels
+Reading-generation math for SensorSimulator, compiled with Numba when it is installed.
+
+Random draws are made in bulk by the caller and passed in, so the kernels
+themselves are deterministic. The kernels carry explicit signatures, so Numba
+compiles them when this module is imported; the first launch writes the
+on-disk cache (__pycache__ next to this file) and later launches load it.
+"""
+
+import math
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit("UniTuple(float64, 2)(float64, float64, float64, float64, float64, float64, float64, float64)",
+      cache=True)
+def gen_normal(phase, n1, n2, base_w, amp_w, base_g, amp_g, gas_max):
+    """Return a normal (water, gas) pair for phase, given standard normal draws n1 and n2."""
+    water = base_w + amp_w * math.sin(phase) + 2.0 * n1
+    water = min(max(water, 8.0), 85.0)  # Lowers to branchless maxsd/minsd
+
+    gas = base_g + amp_g * math.sin(phase * 0.7) + 40.0 * n2
+    gas = min(max(gas, 100.0), gas_max)
+
+    return water, gas
+
+
+@njit("void(float64, float64, float64[:, :], float64, float64, float64, float64, float64, "
+      "float64[:], float64[:])", cache=True)
+def fill_normal(phase_start, step, noise, base_w, amp_w, base_g, amp_g, gas_max, water_out, gas_out):
+    """Fill water_out/gas_out with normal values for consecutive phases (noise has shape (2, n))."""
+    for i in range(water_out.shape[0]):
+        water_out[i], gas_out[i] = gen_normal(phase_start + step * i, noise[0, i], noise[1, i],
+                                              base_w, amp_w, base_g, amp_g, gas_max)
+
+
+@njit(parallel=True, cache=True)
+def fill_normal_bulk(phase_start, step, noise, base_w, amp_w, base_g, amp_g, gas_max, water_out, gas_out):
+    """fill_normal across all cores, for bulk generation (rows are independent)."""
+    for i in prange(water_out.shape[0]):
+        water_out[i], gas_out[i] = gen_normal(phase_start + step * i, noise[0, i], noise[1, i],
+                                              base_w, amp_w, base_g, amp_g, gas_max)
+
+
+@njit(cache=True)
+def apply_bursts(u, trigger, n_types, burst_low, burst_span, water_lo, water_hi, gas_lo, gas_hi,
+                 water, gas, is_anom, type_id):
+    """
+    Overlay random anomaly bursts on bulk normal values, in place.
+
+    Follows the live simulator: each reading outside a burst starts one with
+    probability trigger, of a random type and burst_low + [0, burst_span)
+    further readings. u holds five uniform draws per reading (trigger, type,
+    length, water, gas); normal readings get type id n_types.
+    """
+    remaining = 0
+    t = n_types
+    for i in range(water.shape[0]):
+        if remaining > 0:
+            remaining -= 1
+        elif u[0, i] < trigger:
+            t = int(u[1, i] * n_types)
+            remaining = burst_low + int(u[2, i] * burst_span)
+        else:
+            is_anom[i] = 0
+            type_id[i] = n_types
+            continue
+        water[i] = water_lo[t] + u[3, i] * (water_hi[t] - water_lo[t])
+        gas[i] = gas_lo[t] + u[4, i] * (gas_hi[t] - gas_lo[t])
+        is_anom[i] = 1
+        type_id[i] = t
+
+
+def warm_up():
+    """Call each kernel once so dispatch is primed before the first real reading."""
+    out = np.empty(1)
+    fill_normal(0.0, 0.0, np.zeros((2, 1)), 0.0, 0.0, 0.0, 0.0, 0.0, out, out)
@@ -5,18 +5,22 @@ Orchestrates data source, AI inference, and logging.
 Usage:
     python backend/app.py --mode simulator    # Run with simulated data (no hardware)
     python backend/app.py --mode serial       # Run with ESP32 hardware
+    python backend/app.py --inference-process # Score readings in a separate process
 """
 
 import time
+import queue
 import argparse
 import logging
 import threading
+import multiprocessing as mp
 from datetime import datetime
 
 
-from config.settings import LIVE_DATA_CSV, ALERT_LOG_CSV
+from config.settings import LIVE_DATA_CSV, ALERT_LOG_CSV, MODEL_PATH, INFERENCE_BATCH_SIZE
 from backend.simulator import SensorSimulator
 from backend.data_logger import DataLogger
+from backend.ring_buffer import BoundedRing
 from ai_model.anomaly_detection import AnomalyDetector
 
 logging.basicConfig(
@@ -27,58 +31,115 @@ logging.basicConfig(
 logger = logging.getLogger("DrainGuard")
 
 
+def drain_queue(data_queue, max_batch=INFERENCE_BATCH_SIZE):
+    """Pull up to max_batch readings from the queue without blocking."""
+    if isinstance(data_queue, BoundedRing):
+        return data_queue.drain(max_batch)
+
+    batch = []
+    while len(batch) < max_batch:
+        try:
+            batch.append(data_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def log_results(readings, results, data_logger):
+    """Merge AI results into their readings and log readings and alerts."""
+    for reading, result in zip(readings, results):
+        # Merge reading with AI results
+        enriched = {
+            **reading,
+            "risk_score": result["risk_score"],
+            "risk_level": result["risk_level"],
+            "is_anomaly": int(result["is_anomaly"]),
+            "anomaly_type": result["risk_type"],
+        }
+
+        # Log to CSV
+        data_logger.log_reading(enriched)
+
+        # Log alerts
+        if result["is_anomaly"] and not result.get("alert_suppressed", False):
+            alert = {
+                **enriched,
+                "message": result["details"],
+            }
+            data_logger.log_alert(alert)
+            logger.warning(
+                f"[ALERT] {result['risk_type']} | "
+                f"Risk: {result['risk_score']}% | "
+                f"Water: {reading['water_level_cm']}cm | "
+                f"Gas: {reading['gas_level']}"
+            )
+
+
 def run_inference_loop(data_source, data_logger, detector, stop_event):
     """
     Main inference loop: read from data source -> AI predict -> log results.
+    Readings that queued up since the last pass are scored as one batch.
     """
     logger.info("Inference loop started")
 
     while not stop_event.is_set():
         try:
-            # Get reading from data source (simulator or serial reader)
-            if data_source.data_queue.empty():
+            # Get readings from data source (simulator or serial reader)
+            readings = drain_queue(data_source.data_queue)
+            if not readings:
                 time.sleep(0.1)
                 continue
 
-            reading = data_source.data_queue.get(timeout=1)
-
             # Run AI prediction
-            result = detector.predict(
-                water_level=reading["water_level_cm"],
-                gas_level=reading["gas_level"],
-            )
-
-            # Merge reading with AI results
-            enriched = {
-                **reading,
-                "risk_score": result["risk_score"],
-                "risk_level": result["risk_level"],
-                "is_anomaly": int(result["is_anomaly"]),
-                "anomaly_type": result["risk_type"],
-            }
-
-            # Log to CSV
-            data_logger.log_reading(enriched)
-
-            # Log alerts
-            if result["is_anomaly"] and not result.get("alert_suppressed", False):
-                alert = {
-                    **enriched,
-                    "message": result["details"],
-                }
-                data_logger.log_alert(alert)
-                logger.warning(
-                    f"[ALERT] {result['risk_type']} | "
-                    f"Risk: {result['risk_score']}% | "
-                    f"Water: {reading['water_level_cm']}cm | "
-                    f"Gas: {reading['gas_level']}"
-                )
+            results = detector.predict_batch(readings)
+            log_results(readings, results, data_logger)
 
         except Exception as e:
             logger.error(f"Inference error: {e}")
             time.sleep(0.5)
 
 
+def inference_worker(in_q, out_q, model_path):
+    """
+    Process target: score reading batches from in_q, put (readings, results) on out_q.
+
+    A single worker owns the detector, since its rolling window and alert
+    cooldown depend on seeing readings in order. A None batch stops it.
+    """
+    detector = AnomalyDetector(model_path)
+    while True:
+        readings = in_q.get()
+        if readings is None:
+            break
+        try:
+            out_q.put((readings, detector.predict_batch(readings)))
+        except Exception as e:
+            logger.error(f"Inference worker error: {e}")
+
+
+def run_forward_loop(data_source, in_q, stop_event):
+    """Forward batches of readings from the data source to the inference process."""
+    while not stop_event.is_set():
+        readings = drain_queue(data_source.data_queue)
+        if not readings:
+            time.sleep(0.1)
+            continue
+        in_q.put(readings)
+
+
+def run_results_loop(out_q, data_logger, stop_event):
+    """Log results coming back from the inference process."""
+    while not stop_event.is_set():
+        try:
+            readings, results = out_q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            log_results(readings, results, data_logger)
+        except Exception as e:
+            logger.error(f"Logging error: {e}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="DrainGuard AI Backend")
     parser.add_argument(
@@ -92,6 +153,11 @@ def main():
         default=None,
         help="Serial port (for serial mode, e.g., COM3)",
     )
+    parser.add_argument(
+        "--inference-process",
+        action="store_true",
+        help="Run AI inference in a separate process instead of a thread",
+    )
     args = parser.parse_args()
 
     print("=" * 60)
@@ -111,9 +177,8 @@ def main():
         port = args.port or "COM3"
         data_source = SerialReader(port=port)
 
-    # Logger and detector
+    # Logger
     data_logger = DataLogger()
-    detector = AnomalyDetector()
 
     # Clear previous live data for fresh session
     data_logger.clear_live_data()
@@ -122,14 +187,30 @@ def main():
     data_source.start()
     logger.info(f"Data source ({args.mode}) started")
 
-    # Start inference loop in background thread
     stop_event = threading.Event()
-    inference_thread = threading.Thread(
-        target=run_inference_loop,
-        args=(data_source, data_logger, detector, stop_event),
-        daemon=True,
-    )
-    inference_thread.start()
+    if args.inference_process:
+        # Inference process, fed and drained by two threads in this process
+        in_q, out_q = mp.Queue(), mp.Queue()
+        worker = mp.Process(target=inference_worker, args=(in_q, out_q, MODEL_PATH), daemon=True)
+        worker.start()
+        threads = [
+            threading.Thread(target=run_forward_loop, args=(data_source, in_q, stop_event), daemon=True),
+            threading.Thread(target=run_results_loop, args=(out_q, data_logger, stop_event), daemon=True),
+        ]
+        logger.info(f"Inference process started (pid {worker.pid})")
+    else:
+        # Start inference loop in background thread
+        worker = None
+        detector = AnomalyDetector()
+        threads = [
+            threading.Thread(
+                target=run_inference_loop,
+                args=(data_source, data_logger, detector, stop_event),
+                daemon=True,
+            ),
+        ]
+    for thread in threads:
+        thread.start()
 
     # Main thread: status reporting
     try:
@@ -137,7 +218,6 @@ def main():
             time.sleep(10)
             src_stats = data_source.stats
             log_stats = data_logger.stats
-            det_stats = detector.stats
 
             logger.info(
                 f"[STATUS] Readings: {src_stats.get('readings', 0)} | "
@@ -150,6 +230,12 @@ def main():
         logger.info("Shutting down...")
         stop_event.set()
         data_source.stop()
+        for thread in threads:
+            thread.join(timeout=5)
+        if worker is not None:
+            in_q.put(None)
+            worker.join(timeout=5)
+        data_logger.close()
         logger.info("Backend stopped.")
 
 
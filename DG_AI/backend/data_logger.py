@@ -2,16 +2,30 @@
 DrainGuard AI - Data Logger
 Consumes sensor readings from a queue and logs them to CSV files.
 Supports file rotation and thread-safe operation.
+
+Live readings are buffered in memory and written in batches by a
+background writer thread that keeps the live CSV open. Rotation and
+clearing are handed to that thread too, so the file is never renamed or
+truncated while it holds a handle on it.
+
+After each batch the writer also refreshes a small JSON summary of the
+last DASHBOARD_MAX_POINTS readings (anomaly counts by type), so the
+dashboard can show its KPIs without aggregating the CSV.
 """
 
 import os
 import csv
+import json
+import queue
 import threading
 import logging
+from collections import Counter, deque
 from datetime import datetime
 
 
-from config.settings import LIVE_DATA_CSV, ALERT_LOG_CSV, DATA_DIR
+from config.settings import (
+    LIVE_DATA_CSV, ALERT_LOG_CSV, LIVE_SUMMARY_JSON, DATA_DIR, DASHBOARD_MAX_POINTS,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,28 +34,58 @@ CSV_HEADERS = ["timestamp", "water_level_cm", "gas_level", "is_anomaly", "anomal
 ALERT_HEADERS = ["timestamp", "anomaly_type", "risk_score", "risk_level",
                  "water_level_cm", "gas_level", "message"]
 
-MAX_LIVE_ROWS = 10000  # Rotate after this many rows
+# Fixed row formats for the hot write path (csv.writer is kept for headers).
+# Line endings match csv.writer's default so rows and headers agree.
+LIVE_FMT = "%s,%.2f,%d,%d,%s,%.1f,%s\r\n"
+ALERT_FMT = '%s,%s,%.1f,%s,%.2f,%d,"%s"\r\n'
+
+MAX_LIVE_BYTES = 1 << 20  # Rotate the live CSV once it exceeds 1 MiB
+WRITE_QUEUE_SIZE = 10000  # Pending live rows before new readings are dropped
+WRITE_BATCH_ROWS = 256    # Max rows per writer batch
+FLUSH_INTERVAL = 0.2      # Seconds the writer waits for more rows
+FILE_OP_TIMEOUT = 5       # Seconds to wait for the writer to rotate/clear
+SUMMARY_WINDOW = DASHBOARD_MAX_POINTS  # Readings covered by the live summary
 
 
 class DataLogger:
     """Thread-safe CSV logger for sensor data and alerts."""
 
-    def __init__(self, live_csv=LIVE_DATA_CSV, alert_csv=ALERT_LOG_CSV):
+    def __init__(self, live_csv=LIVE_DATA_CSV, alert_csv=ALERT_LOG_CSV, summary_json=LIVE_SUMMARY_JSON):
         self.live_csv = live_csv
         self.alert_csv = alert_csv
+        self.summary_json = summary_json
         self._lock = threading.Lock()
-        self._row_count = 0
+        self._row_count = 0       # Rows written this session (informational)
+        self._bytes_written = 0   # Current live CSV size, drives rotation
         self._alert_count = 0
+        self._dropped_count = 0
         self._initialize_files()
 
+        # Background writer for live readings
+        self._write_q = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._live_file = None
+        self._rotate_event = threading.Event()  # Requests checked by the writer
+        self._clear_event = threading.Event()   # between batches
+        self._file_op_done = threading.Event()
+
+        # Rolling summary of written rows, owned by the writer thread
+        self._recent_types = deque(maxlen=SUMMARY_WINDOW)  # anomaly_type, or None if normal
+        self._type_counts = Counter()
+        self._last_timestamp = None
+
+        self._running = True
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
+
     def _initialize_files(self):
         """Create CSV files with headers if they don't exist."""
         os.makedirs(DATA_DIR, exist_ok=True)
 
-        if not os.path.exists(self.live_csv):
-            with open(self.live_csv, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(CSV_HEADERS)
+        # Size check is O(1), unlike scanning the file for a row count
+        try:
+            self._bytes_written = os.path.getsize(self.live_csv)
+        except OSError:
+            self._create_live_file()
             logger.info(f"Created {self.live_csv}")
 
         if not os.path.exists(self.alert_csv):
@@ -50,13 +94,6 @@ class DataLogger:
                 writer.writerow(ALERT_HEADERS)
             logger.info(f"Created {self.alert_csv}")
 
-        # Count existing rows
-        try:
-            with open(self.live_csv, 'r') as f:
-                self._row_count = sum(1 for _ in f) - 1  # Minus header
-        except Exception:
-            self._row_count = 0
-
         # Count existing alerts (#10: persist alert count across restarts)
         try:
             with open(self.alert_csv, 'r') as f:
@@ -64,51 +101,183 @@ class DataLogger:
         except Exception:
             self._alert_count = 0
 
-    def log_reading(self, reading: dict):
-        """Log a sensor reading to the live CSV."""
-        with self._lock:
-            # Check for rotation
-            if self._row_count >= MAX_LIVE_ROWS:
-                self._rotate_file()
+    def _create_live_file(self):
+        """Create (or truncate) the live CSV with just the header row."""
+        with open(self.live_csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADERS)
+            self._bytes_written = f.tell()
 
-            row = [
-                reading.get("timestamp", datetime.now().isoformat()),
+    def log_reading(self, reading: dict):
+        """Queue a sensor reading for the background writer (non-blocking)."""
+        # anomaly_type / risk_level are controlled enum strings: no quoting needed
+        # Gas is rounded (not truncated by %d); a malformed row is skipped on its own
+        timestamp = reading.get("timestamp") or datetime.now().isoformat()
+        try:
+            row = LIVE_FMT % (
+                timestamp,
                 reading.get("water_level_cm", 0),
-                reading.get("gas_level", 0),
+                round(reading.get("gas_level", 0)),
                 reading.get("is_anomaly", 0),
                 reading.get("anomaly_type", "NORMAL"),
                 reading.get("risk_score", 0),
                 reading.get("risk_level", "NORMAL"),
-            ]
+            )
+        except (TypeError, ValueError) as e:
+            self._dropped_count += 1
+            logger.warning(f"Skipping malformed reading: {e}")
+            return
+        anomaly_type = reading.get("anomaly_type", "NORMAL") if reading.get("is_anomaly", 0) else None
 
-            with open(self.live_csv, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
+        try:
+            self._write_q.put_nowait((row, timestamp, anomaly_type))
+        except queue.Full:
+            self._dropped_count += 1
+            logger.warning("Live write queue full, dropping reading")
+
+    def _writer_loop(self):
+        """Drain queued rows in batches into the long-lived live CSV handle."""
+        while self._running or not self._write_q.empty():
+            self._handle_file_requests()
+            try:
+                batch = [self._write_q.get(timeout=FLUSH_INTERVAL)]
+            except queue.Empty:
+                continue
+            while len(batch) < WRITE_BATCH_ROWS:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_rows([row for row, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Live write failed: {e}")
+                continue
+            self._update_summary(batch)
+            self._write_summary()
+
+        self._handle_file_requests()
+        self._close_live_file()
+
+    def _handle_file_requests(self):
+        """Carry out pending rotate/clear requests on the writer thread."""
+        if not (self._rotate_event.is_set() or self._clear_event.is_set()):
+            return
+        with self._lock:
+            try:
+                if self._clear_event.is_set():
+                    self._clear_event.clear()
+                    self._close_live_file_locked()
+                    self._create_live_file()
+                    self._row_count = 0
+                    self._recent_types.clear()
+                    self._type_counts.clear()
+                    self._last_timestamp = None
+                    self._write_summary()
+                    logger.info("Live data cleared")
+                if self._rotate_event.is_set():
+                    self._rotate_event.clear()
+                    self._rotate_file()
+            except OSError as e:
+                logger.error(f"Live file operation failed: {e}")
+            finally:
+                self._file_op_done.set()
 
-            self._row_count += 1
+    def _request_file_op(self, event):
+        """Ask the writer to perform a file operation and wait until it has."""
+        self._file_op_done.clear()
+        event.set()
+        if self._writer_thread.is_alive():
+            if not self._file_op_done.wait(FILE_OP_TIMEOUT):
+                logger.warning("Timed out waiting for the live data writer")
+        else:
+            self._handle_file_requests()
+
+    def _write_rows(self, rows):
+        """Write a batch of rows, rotating the file first if it is full."""
+        with self._lock:
+            if self._bytes_written >= MAX_LIVE_BYTES:
+                self._rotate_file()
+
+            if self._live_file is None:
+                self._live_file = open(self.live_csv, 'a', newline='', buffering=1 << 16)
+            data = "".join(rows)
+            self._live_file.write(data)
+            self._live_file.flush()
+
+            self._row_count += len(rows)
+            self._bytes_written += len(data)  # Rows are ASCII: chars == bytes
+
+    def _update_summary(self, batch):
+        """Fold a written batch of (row, timestamp, anomaly_type) into the rolling window."""
+        recent, counts = self._recent_types, self._type_counts
+        for _, _, anomaly_type in batch:
+            if len(recent) == SUMMARY_WINDOW and recent[0] is not None:
+                counts[recent[0]] -= 1
+            recent.append(anomaly_type)
+            if anomaly_type is not None:
+                counts[anomaly_type] += 1
+        self._last_timestamp = batch[-1][1]
+
+    def _write_summary(self):
+        """Atomically replace the summary file read by the dashboard."""
+        summary = {
+            "timestamp": self._last_timestamp,  # Last row covered (matches the live CSV)
+            "readings": len(self._recent_types),
+            "anomalies": sum(self._type_counts.values()),
+            "anomaly_types": {t: n for t, n in self._type_counts.items() if n > 0},
+        }
+        tmp_path = self.summary_json + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(summary, f)
+            os.replace(tmp_path, self.summary_json)
+        except OSError as e:
+            logger.debug(f"Summary write failed: {e}")
+
+    def _close_live_file(self):
+        with self._lock:
+            self._close_live_file_locked()
+
+    def _close_live_file_locked(self):
+        if self._live_file is not None:
+            self._live_file.close()
+            self._live_file = None
+
+    def close(self):
+        """Flush pending readings and stop the writer thread."""
+        self._running = False
+        self._writer_thread.join(timeout=5)
 
     def log_alert(self, alert: dict):
         """Log an anomaly alert."""
-        with self._lock:
-            row = [
-                alert.get("timestamp", datetime.now().isoformat()),
+        # The free-text message is always quoted, with embedded quotes doubled
+        try:
+            row = ALERT_FMT % (
+                alert.get("timestamp") or datetime.now().isoformat(),
                 alert.get("anomaly_type", "UNKNOWN"),
                 alert.get("risk_score", 0),
                 alert.get("risk_level", "UNKNOWN"),
                 alert.get("water_level_cm", 0),
-                alert.get("gas_level", 0),
-                alert.get("message", ""),
-            ]
+                round(alert.get("gas_level", 0)),
+                str(alert.get("message") or "").replace('"', '""'),
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Skipping malformed alert: {e}")
+            return
 
+        with self._lock:
             with open(self.alert_csv, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
+                f.write(row)
 
             self._alert_count += 1
             logger.warning(f"ALERT: {alert.get('anomaly_type')} - Risk: {alert.get('risk_score')}%")
 
     def _rotate_file(self):
-        """Rotate the live CSV when it gets too large."""
+        """Rotate the live CSV when it gets too large. Writer thread, lock held."""
+        self._close_live_file_locked()
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         archive_path = os.path.join(DATA_DIR, f"live_data_archive_{timestamp}.csv")
 
@@ -119,24 +288,20 @@ class DataLogger:
             logger.error(f"Rotation failed: {e}")
             return  # Don't create fresh file if rename failed — prevents data loss
 
-        # Create fresh file
-        with open(self.live_csv, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(CSV_HEADERS)
-        self._row_count = 0
+        self._create_live_file()
+
+    def flush_and_rotate(self):
+        """Archive the live CSV now and start a fresh one (done by the writer thread)."""
+        self._request_file_op(self._rotate_event)
 
     def clear_live_data(self):
         """Clear the live data file (for dashboard reset)."""
-        with self._lock:
-            with open(self.live_csv, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(CSV_HEADERS)
-            self._row_count = 0
-            logger.info("Live data cleared")
+        self._request_file_op(self._clear_event)
 
     @property
     def stats(self):
         return {
             "live_rows": self._row_count,
             "alert_count": self._alert_count,
+            "dropped": self._dropped_count,
         }
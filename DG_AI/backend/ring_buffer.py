@@ -0,0 +1,79 @@
+"""
+DrainGuard AI - Bounded Ring Buffer
+Drop-oldest reading buffer shared between a data source and the inference loop.
+
+Appending to a full buffer silently overwrites the oldest reading instead of
+raising queue.Full, so producers never block or handle exceptions.
+"""
+
+import queue
+import threading
+from collections import deque
+
+
+class BoundedRing:
+    """Thread-safe FIFO of fixed capacity that overwrites the oldest item when full."""
+
+    def __init__(self, maxlen=1000):
+        self.maxlen = maxlen
+        self._items = deque(maxlen=maxlen)
+        self._not_empty = threading.Event()
+        self._dropped = 0
+
+    def put(self, item):
+        """Append an item, evicting the oldest one if the buffer is full."""
+        if len(self._items) == self.maxlen:
+            self._dropped += 1
+        self._items.append(item)  # atomic under the GIL; drops oldest when full
+        self._not_empty.set()
+
+    # queue.Queue-compatible alias
+    put_nowait = put
+
+    def popleft(self):
+        """Remove and return the oldest item. Raises IndexError when empty."""
+        return self._items.popleft()
+
+    def get_nowait(self):
+        """Remove and return the oldest item. Raises queue.Empty when empty."""
+        try:
+            return self._items.popleft()
+        except IndexError:
+            raise queue.Empty from None
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, waiting up to timeout seconds."""
+        while True:
+            try:
+                return self._items.popleft()
+            except IndexError:
+                self._not_empty.clear()
+                if self._items:
+                    continue  # A put raced with clear()
+                if not self._not_empty.wait(timeout):
+                    raise queue.Empty from None
+
+    def drain(self, max_items):
+        """Remove and return up to max_items of the oldest items."""
+        items = []
+        popleft = self._items.popleft
+        try:
+            while len(items) < max_items:
+                items.append(popleft())
+        except IndexError:
+            pass
+        return items
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def dropped(self):
+        """Number of items overwritten because the buffer was full."""
+        return self._dropped
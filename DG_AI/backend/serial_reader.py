@@ -2,23 +2,29 @@
 DrainGuard AI - Serial Reader
 Reads JSON sensor data from ESP32 via USB serial port.
 
-Provides a thread-safe queue interface for downstream consumers.
+Provides a thread-safe, drop-oldest ring buffer for downstream consumers.
 """
 
-import json
 import time
 import threading
-import queue
 import logging
 from datetime import datetime
 
 import serial
 
+try:
+    import orjson as _json  # C parser, accepts bytes directly
+except ImportError:
+    import json as _json
+
 
 from config.settings import SERIAL_PORT, SERIAL_BAUD, SERIAL_TIMEOUT
+from backend.ring_buffer import BoundedRing
 
 logger = logging.getLogger(__name__)
 
+MAX_LINE_BYTES = 4096  # Drop the receive buffer if no newline arrives within this
+
 
 class SerialReader:
     """Reads JSON data from ESP32 serial port and pushes to a queue."""
@@ -27,10 +33,11 @@ class SerialReader:
         self.port = port
         self.baud = baud
         self.timeout = timeout
-        self.data_queue = queue.Queue(maxsize=1000)
+        self.data_queue = BoundedRing(maxlen=1000)
         self._running = False
         self._thread = None
         self._ser = None
+        self._rx = bytearray()  # Bytes received but not yet split into lines
         self._error_count = 0
         self._read_count = 0
 
@@ -51,60 +58,36 @@ class SerialReader:
         logger.info("Serial reader stopped")
 
     def _read_loop(self):
-        """Main read loop - connects to serial and parses JSON lines."""
+        """Main read loop - connects to serial and frames JSON lines from buffered reads."""
         while self._running:
             try:
                 if self._ser is None or not self._ser.is_open:
                     self._connect()
+                    self._rx.clear()  # Drop any partial line from the old connection
 
-                line = self._ser.readline()
-                if not line:
-                    continue
-
-                line_str = line.decode('utf-8', errors='ignore').strip()
-                if not line_str:
-                    continue
-
-                # Parse JSON
-                data = json.loads(line_str)
-
-                # Skip boot/event messages
-                if "event" in data:
-                    logger.info(f"ESP32 event: {data}")
+                # Read whatever is available (blocks up to timeout for 1 byte)
+                chunk = self._ser.read(max(self._ser.in_waiting, 1))
+                if not chunk:
                     continue
-
-                # Validate required fields
-                if "water_level" not in data or "gas_level" not in data:
+                self._rx += chunk
+
+                # Consume each complete line before handling it, so a line that
+                # fails can never be seen (or re-queue earlier lines) again
+                rx = self._rx
+                while (end := rx.find(b'\n')) != -1:
+                    line = bytes(rx[:end])
+                    del rx[:end + 1]
+                    try:
+                        self._handle_line(line)
+                    except Exception as e:
+                        logger.warning(f"Bad serial line: {e}")
+                        self._error_count += 1
+
+                if len(rx) > MAX_LINE_BYTES:
+                    logger.warning("Discarding oversized serial line")
                     self._error_count += 1
-                    continue
+                    rx.clear()
 
-                # Validate ranges
-                water = data["water_level"]
-                gas = data["gas_level"]
-
-                if water < -1 or water > 500 or gas < 0 or gas > 4095:
-                    logger.warning(f"Out-of-range reading: water={water}, gas={gas}")
-                    self._error_count += 1
-                    continue
-
-                # Add timestamp and normalize fields
-                data["timestamp"] = datetime.now().isoformat()
-                data["water_level_cm"] = round(water, 2)
-                data.pop("water_level", None)  # Remove raw key to avoid duplicate
-                data.setdefault("is_anomaly", 0)
-                data.setdefault("anomaly_type", "NORMAL")
-
-                try:
-                    self.data_queue.put_nowait(data)
-                    self._read_count += 1
-                except queue.Full:
-                    # Drop oldest if full
-                    self.data_queue.get_nowait()
-                    self.data_queue.put_nowait(data)
-
-            except json.JSONDecodeError:
-                self._error_count += 1
-                continue
             except serial.SerialException as e:
                 logger.error(f"Serial error: {e}")
                 self._ser = None
@@ -113,6 +96,59 @@ class SerialReader:
                 logger.error(f"Unexpected error: {e}")
                 time.sleep(1)
 
+    def _handle_line(self, line):
+        """Parse one raw serial line and queue it if it is a valid reading."""
+        line = line.strip()
+        if not line:
+            return
+
+        # Non-JSON lines (debug prints, partial frames) count as errors
+        if not line.startswith(b'{'):
+            self._error_count += 1
+            return
+
+        # Parse JSON straight from bytes
+        try:
+            data = _json.loads(line)
+        except ValueError:  # JSONDecodeError (json/orjson) or bad UTF-8
+            self._error_count += 1
+            return
+
+        # Skip boot/event messages
+        if "event" in data:
+            logger.info(f"ESP32 event: {data}")
+            return
+
+        # Validate required fields
+        if "water_level" not in data or "gas_level" not in data:
+            self._error_count += 1
+            return
+
+        # Validate types (bool is an int subclass, but not a reading) and ranges
+        water = data["water_level"]
+        gas = data["gas_level"]
+
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (water, gas)):
+            logger.warning(f"Non-numeric reading: water={water!r}, gas={gas!r}")
+            self._error_count += 1
+            return
+
+        if water < -1 or water > 500 or gas < 0 or gas > 4095:
+            logger.warning(f"Out-of-range reading: water={water}, gas={gas}")
+            self._error_count += 1
+            return
+
+        # Add timestamp and normalize fields
+        data["timestamp"] = datetime.now().isoformat()
+        data["water_level_cm"] = round(water, 2)
+        data.pop("water_level", None)  # Remove raw key to avoid duplicate
+        data.setdefault("is_anomaly", 0)
+        data.setdefault("anomaly_type", "NORMAL")
+
+        # Drops the oldest reading if the buffer is full
+        self.data_queue.put(data)
+        self._read_count += 1
+
     def _connect(self):
         """Establish serial connection with retry."""
         while self._running:
@@ -135,5 +171,6 @@ class SerialReader:
             "readings": self._read_count,
             "errors": self._error_count,
             "queue_size": self.data_queue.qsize(),
+            "dropped": self.data_queue.dropped,
             "connected": self._ser is not None and self._ser.is_open,
         }
@@ -2,21 +2,23 @@
 DrainGuard AI - Sensor Simulator
 Generates realistic fake sensor data for demo/testing without ESP32 hardware.
 
-Provides the same queue-based interface as SerialReader.
+Provides the same queue-based interface as SerialReader. SensorSimulator
+runs on its own thread; AsyncSensorSimulator runs on an asyncio event loop,
+so many simulated sensors can share one thread.
 """
 
 import time
-import queue
+import asyncio
 import threading
 import logging
 import numpy as np
-from datetime import datetime
 
 
 from config.settings import (
     SIMULATOR_INTERVAL,
     SIMULATOR_ANOMALY_RATE,
     SIMULATOR_BURST_DURATION,
+    SIMULATOR_BATCH_SIZE,
     WATER_LEVEL_NORMAL_LOW,
     WATER_LEVEL_NORMAL_HIGH,
     WATER_BLOCKAGE_THRESHOLD,
@@ -24,9 +26,67 @@ from config.settings import (
     GAS_NORMAL_MAX,
     GAS_DANGER_THRESHOLD,
 )
+from backend._sim_kernels import fill_normal, fill_normal_bulk, apply_bursts, warm_up
+from backend.ring_buffer import BoundedRing
 
 logger = logging.getLogger(__name__)
 
+PHASE_STEP = 0.05  # Phase advance of the daily-pattern sine per reading
+
+# Anomaly type ids, indexing the value-range tables below
+ANOM_BLOCKAGE = 0
+ANOM_LEAKAGE = 1
+ANOM_GAS = 2
+ANOM_FLOOD = 3
+ANOM_GENERIC = 4  # No type selected: a random type is picked when a burst starts
+
+_ID_TO_NAME = ("BLOCKAGE", "LEAKAGE", "GAS_HAZARD", "FLOOD_RISK", None)
+_NAME_TO_ID = {name: i for i, name in enumerate(_ID_TO_NAME) if name is not None}
+
+# Anomalous value ranges per type id (struct-of-arrays)
+_ANOM_WATER_LO = np.array([2.0, WATER_LEAKAGE_THRESHOLD, 20.0, 1.0, 5.0])
+_ANOM_WATER_HI = np.array([WATER_BLOCKAGE_THRESHOLD, 160.0, 55.0, 8.0, 90.0])
+_ANOM_GAS_LO = np.array([300.0, 200.0, GAS_DANGER_THRESHOLD, 800.0, 100.0])
+_ANOM_GAS_HI = np.array([900.0, 600.0, 3800.0, 2000.0, 3000.0])
+
+QUEUE_SIZE = 1000
+MAX_LAG_INTERVALS = 5     # Fall further behind than this and the schedule resets
+UNIFORM_POOL_SIZE = 4096  # Uniform draws made per refill of the random pool
+# Reading records are recycled round-robin. The pool must outlast every
+# reading still in the queue plus a batch held by the consumer.
+READING_POOL_SIZE = 2048  # Power of two: the index wraps with a mask
+
+# Row layout of the reading history ring (and bulk output): epoch seconds,
+# values, anomaly flag and anomaly type id (ANOM_GENERIC for normal readings)
+READING_DTYPE = np.dtype([
+    ("ts", "f8"),
+    ("water", "f4"),
+    ("gas", "i2"),
+    ("is_anom", "u1"),
+    ("type_id", "u1"),
+])
+HISTORY_SIZE = 1024  # Power of two: the head wraps with a mask
+
+READING_FIELDS = ("timestamp", "water_level_cm", "gas_level", "is_anomaly", "anomaly_type")
+
+
+class Reading:
+    """Reusable reading record, readable like a dict (reading["gas_level"], {**reading})."""
+
+    __slots__ = READING_FIELDS
+
+    def keys(self):
+        return READING_FIELDS
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __repr__(self):
+        return f"Reading({dict(self)!r})"
+
 
 class SensorSimulator:
     """Generates realistic sensor data with controllable anomaly injection."""
@@ -34,18 +94,57 @@ class SensorSimulator:
     def __init__(self, interval=SIMULATOR_INTERVAL, anomaly_rate=SIMULATOR_ANOMALY_RATE):
         self.interval = interval
         self.anomaly_rate = anomaly_rate
-        self.data_queue = queue.Queue(maxsize=1000)
+        self.data_queue = BoundedRing(maxlen=QUEUE_SIZE)
         self._running = False
+        self._stop_evt = threading.Event()  # Wakes the generator loop on stop()
         self._thread = None
         self._read_count = 0
         self._inject_anomaly = False  # Manual anomaly trigger
         self._anomaly_burst_remaining = 0
-        self._current_anomaly_type = None
+        self._current_anomaly_id = ANOM_GENERIC  # Manual selection for the next burst
+        self._burst_type_id = ANOM_GENERIC  # Type of the current burst (labels its readings)
+        self._burst_water = []  # Values for the whole current burst, drawn at its start
+        self._burst_gas = []
+        self._burst_pos = 0
         self._rng = np.random.default_rng()
+        self._uni = []  # Pre-drawn uniforms in [0, 1), refilled in bulk
+        self._uni_idx = 0
+        self._pool = [Reading() for _ in range(READING_POOL_SIZE)]
+        self._pool_idx = 0
+        self._ring = np.zeros(HISTORY_SIZE, dtype=READING_DTYPE)
+        self._ring_head = 0  # Total readings written; the next row is head & (size - 1)
+        self._ts_cached_sec = 0   # Second the cached timestamp prefix belongs to
+        self._ts_cached_str = ""
+
+        # Normal-pattern constants, computed once
+        self._water_base = (WATER_LEVEL_NORMAL_LOW + WATER_LEVEL_NORMAL_HIGH) / 2
+        self._water_amp = (WATER_LEVEL_NORMAL_HIGH - WATER_LEVEL_NORMAL_LOW) / 3
+        self._gas_base = 400.0
+        self._gas_amp = 80.0
+        self._gas_norm_max = float(GAS_NORMAL_MAX)
+
+        # Pre-generated normal values, one per tick, refilled every batch_size ticks
+        self._batch_size = SIMULATOR_BATCH_SIZE
+        self._water_buf = np.empty(self._batch_size, dtype=np.float64)
+        self._gas_buf = np.empty(self._batch_size, dtype=np.float64)
+        self._water_vals = []
+        self._gas_vals = []
+        self._buf_idx = self._batch_size
+
+    @property
+    def anomaly_rate(self):
+        return self._anomaly_rate
+
+    @anomaly_rate.setter
+    def anomaly_rate(self, rate):
+        self._anomaly_rate = rate
+        self._anomaly_trigger = rate * 0.1  # Per-reading chance of starting a burst
 
     def start(self):
         """Start the simulator in a background thread."""
         self._running = True
+        self._stop_evt.clear()
+        warm_up()  # Keep kernel start-up cost out of the first reading
         self._thread = threading.Thread(target=self._generate_loop, daemon=True)
         self._thread.start()
         logger.info(f"Sensor simulator started (interval={self.interval}s)")
@@ -53,6 +152,7 @@ class SensorSimulator:
     def stop(self):
         """Stop the simulator."""
         self._running = False
+        self._stop_evt.set()
         if self._thread:
             self._thread.join(timeout=5)
         logger.info("Sensor simulator stopped")
@@ -60,111 +160,265 @@ class SensorSimulator:
     def trigger_anomaly(self, anomaly_type=None):
         """Manually trigger an anomaly burst for demo purposes."""
         self._inject_anomaly = True
-        self._current_anomaly_type = anomaly_type
+        self._current_anomaly_id = _NAME_TO_ID.get(anomaly_type, ANOM_GENERIC)
         logger.info(f"Anomaly triggered: {anomaly_type or 'random'}")
 
     def _generate_loop(self):
-        """Main data generation loop."""
+        """
+        Main data generation loop.
+
+        Readings are paced against a fixed schedule rather than a sleep after
+        each one, so generation time does not stretch the interval. A loop
+        that falls behind catches up without sleeping.
+        """
         phase = 0.0
+        deadline = time.monotonic()
         while self._running:
             try:
-                phase += 0.05
+                phase += PHASE_STEP
                 reading = self._generate_reading(phase)
 
-                try:
-                    self.data_queue.put_nowait(reading)
-                    self._read_count += 1
-                except queue.Full:
-                    self.data_queue.get_nowait()
-                    self.data_queue.put_nowait(reading)
+                self.data_queue.put(reading)  # Drops the oldest reading when full
+                self._read_count += 1
 
-                time.sleep(self.interval)
+                deadline += self.interval
+                now = time.monotonic()
+                if now - deadline > MAX_LAG_INTERVALS * self.interval:
+                    deadline = now  # Too far behind (e.g. system suspend): don't burst
+                sleep_for = deadline - now
+                if sleep_for > 0:
+                    self._stop_evt.wait(sleep_for)
 
             except Exception as e:
                 logger.error(f"Simulator error: {e}")
-                time.sleep(1)
+                self._stop_evt.wait(1)
+                deadline = time.monotonic()
 
     def _generate_reading(self, phase):
         """Generate a single sensor reading."""
-        is_anomaly = False
+        # Consumed every tick, even during bursts, so the buffer stays in phase
+        water, gas = self._next_normal_values(phase)
 
-        # Check for anomaly burst
-        if self._anomaly_burst_remaining > 0:
-            water, gas = self._generate_anomaly_values()
-            self._anomaly_burst_remaining -= 1
-            is_anomaly = True
-            if self._anomaly_burst_remaining == 0:
-                self._current_anomaly_type = None  # Reset after burst ends
-        elif self._inject_anomaly or self._rng.random() < self.anomaly_rate * 0.1:
-            # Start new anomaly burst
+        # Outside a burst, maybe start one: it then covers this reading too
+        if not self._anomaly_burst_remaining and (
+                self._inject_anomaly or self._draw_uniform() < self._anomaly_trigger):
             self._start_anomaly_burst()
-            water, gas = self._generate_anomaly_values()
-            is_anomaly = True
             self._inject_anomaly = False
+
+        if self._anomaly_burst_remaining:
+            # Anomaly burst: next pre-drawn values
+            pos = self._burst_pos
+            self._burst_pos = pos + 1
+            water = self._burst_water[pos]
+            gas = self._burst_gas[pos]
+            is_anomaly = 1
+            anomaly_id = self._burst_type_id
+            anomaly_type = _ID_TO_NAME[anomaly_id]
+            self._anomaly_burst_remaining -= 1
         else:
-            # Normal readings
-            water, gas = self._generate_normal_values(phase)
+            is_anomaly = 0
+            anomaly_id = ANOM_GENERIC
+            anomaly_type = "NORMAL"
 
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "water_level_cm": round(float(water), 2),
-            "gas_level": int(gas),
-            "is_anomaly": int(is_anomaly),
-            "anomaly_type": self._current_anomaly_type if is_anomaly else "NORMAL",
-        }
+        now = time.time()
+        reading = self._pool[self._pool_idx]
+        self._pool_idx = (self._pool_idx + 1) & (READING_POOL_SIZE - 1)
+        reading.timestamp = self._timestamp(now)
+        reading.water_level_cm = round(float(water), 2)
+        reading.gas_level = int(gas)
+        reading.is_anomaly = is_anomaly
+        reading.anomaly_type = anomaly_type
+
+        self._ring[self._ring_head & (HISTORY_SIZE - 1)] = (
+            now, reading.water_level_cm, reading.gas_level, reading.is_anomaly, anomaly_id)
+        self._ring_head += 1
+        return reading
+
+    def recent(self, n=HISTORY_SIZE):
+        """
+        Return the last n readings (at most HISTORY_SIZE) as a READING_DTYPE array, oldest first.
+
+        Columns can be used directly for windowed statistics, e.g.
+        sim.recent(10)["water"].mean().
+        """
+        n = min(n, self._ring_head, HISTORY_SIZE)
+        idx = np.arange(self._ring_head - n, self._ring_head) & (HISTORY_SIZE - 1)
+        return self._ring[idx]
 
-    def _generate_normal_values(self, phase):
-        """Generate normal sensor values with realistic patterns."""
-        water_base = (WATER_LEVEL_NORMAL_LOW + WATER_LEVEL_NORMAL_HIGH) / 2
-        water_amplitude = (WATER_LEVEL_NORMAL_HIGH - WATER_LEVEL_NORMAL_LOW) / 3
-        water = water_base + water_amplitude * np.sin(phase) + self._rng.normal(0, 2.0)
-        water = np.clip(water, 8.0, 85.0)
+    def generate_bulk(self, n, start_ts=None):
+        """
+        Generate n readings at once, for load tests and offline training data.
 
-        gas = 400 + 80 * np.sin(phase * 0.7) + self._rng.normal(0, 40)
-        gas = np.clip(gas, 100, GAS_NORMAL_MAX)
+        Readings follow the live simulator's patterns and anomaly bursts but
+        are computed in bulk (normal values across all cores when Numba is
+        installed) with timestamps interval apart. Live state is untouched.
 
-        return water, gas
+        Returns:
+            READING_DTYPE array of length n
+        """
+        if start_ts is None:
+            start_ts = time.time()
+        out = np.empty(n, dtype=READING_DTYPE)
+        water = np.empty(n, dtype=np.float64)
+        gas = np.empty(n, dtype=np.float64)
+        is_anom = np.empty(n, dtype=np.uint8)
+        type_id = np.empty(n, dtype=np.uint8)
+
+        noise = self._rng.standard_normal((2, n))
+        fill_normal_bulk(PHASE_STEP, PHASE_STEP, noise, self._water_base, self._water_amp,
+                         self._gas_base, self._gas_amp, self._gas_norm_max, water, gas)
+
+        low = SIMULATOR_BURST_DURATION // 2
+        apply_bursts(self._rng.random((5, n)), self._anomaly_trigger, ANOM_GENERIC,
+                     low, SIMULATOR_BURST_DURATION + 1 - low,
+                     _ANOM_WATER_LO, _ANOM_WATER_HI, _ANOM_GAS_LO, _ANOM_GAS_HI,
+                     water, gas, is_anom, type_id)
+
+        out["ts"] = start_ts + self.interval * np.arange(n)
+        out["water"] = np.round(water, 2)
+        out["gas"] = gas  # Truncates like int(gas) on the live path
+        out["is_anom"] = is_anom
+        out["type_id"] = type_id
+        return out
+
+    def _timestamp(self, now):
+        """Local ISO-8601 timestamp of epoch time now, reformatting the date part once a second."""
+        sec = int(now)
+        if sec != self._ts_cached_sec:
+            self._ts_cached_str = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sec))
+            self._ts_cached_sec = sec
+        return f"{self._ts_cached_str}.{int((now - sec) * 1e6):06d}"
+
+    def _draw_uniform(self):
+        """Return the next pre-drawn uniform value in [0, 1)."""
+        if self._uni_idx >= len(self._uni):
+            self._uni = self._rng.random(UNIFORM_POOL_SIZE).tolist()
+            self._uni_idx = 0
+        u = self._uni[self._uni_idx]
+        self._uni_idx += 1
+        return u
+
+    def _next_normal_values(self, phase):
+        """Return the pre-generated normal (water, gas) values for this tick's phase."""
+        if self._buf_idx >= self._batch_size:
+            self._refill_normal_batch(phase)
+        i = self._buf_idx
+        self._buf_idx += 1
+        return self._water_vals[i], self._gas_vals[i]
+
+    def _refill_normal_batch(self, phase_start):
+        """Generate the next batch_size normal readings with realistic patterns."""
+        noise = self._rng.standard_normal((2, self._batch_size))
+        fill_normal(phase_start, PHASE_STEP, noise, self._water_base, self._water_amp,
+                    self._gas_base, self._gas_amp, self._gas_norm_max,
+                    self._water_buf, self._gas_buf)
+
+        # Lists of Python floats: cheaper to index one value at a time
+        self._water_vals = self._water_buf.tolist()
+        self._gas_vals = self._gas_buf.tolist()
+        self._buf_idx = 0
 
     def _start_anomaly_burst(self):
-        """Initialize an anomaly burst."""
-        anomaly_types = ["BLOCKAGE", "LEAKAGE", "GAS_HAZARD", "FLOOD_RISK"]
-        if self._current_anomaly_type and self._current_anomaly_type in anomaly_types:
-            pass  # Keep manual selection
-        else:
-            self._current_anomaly_type = self._rng.choice(anomaly_types)
-
-        self._anomaly_burst_remaining = self._rng.integers(
-            SIMULATOR_BURST_DURATION // 2,
-            SIMULATOR_BURST_DURATION + 1
-        )
-
-    def _generate_anomaly_values(self):
-        """Generate anomalous sensor values based on current anomaly type."""
-        rng = self._rng
-
-        if self._current_anomaly_type == "BLOCKAGE":
-            water = rng.uniform(2.0, WATER_BLOCKAGE_THRESHOLD)
-            gas = rng.uniform(300, 900)
-        elif self._current_anomaly_type == "LEAKAGE":
-            water = rng.uniform(WATER_LEAKAGE_THRESHOLD, 160.0)
-            gas = rng.uniform(200, 600)
-        elif self._current_anomaly_type == "GAS_HAZARD":
-            water = rng.uniform(20.0, 55.0)
-            gas = rng.uniform(GAS_DANGER_THRESHOLD, 3800)
-        elif self._current_anomaly_type == "FLOOD_RISK":
-            water = rng.uniform(1.0, 8.0)
-            gas = rng.uniform(800, 2000)
+        """
+        Initialize an anomaly burst.
+
+        The type is fixed together with the burst's values, so a trigger
+        arriving mid-burst selects the type of the next burst instead.
+        """
+        if self._current_anomaly_id == ANOM_GENERIC:
+            self._burst_type_id = int(self._draw_uniform() * ANOM_GENERIC)
         else:
-            water = rng.uniform(5.0, 90.0)
-            gas = rng.uniform(100, 3000)
+            self._burst_type_id = self._current_anomaly_id  # Manual selection, now used up
+            self._current_anomaly_id = ANOM_GENERIC
 
-        return water, gas
+        # Uniform integer in [BURST_DURATION // 2, BURST_DURATION]
+        low = SIMULATOR_BURST_DURATION // 2
+        span = SIMULATOR_BURST_DURATION + 1 - low
+        # Readings left in the burst, counting the one that starts it
+        self._anomaly_burst_remaining = low + int(self._draw_uniform() * span) + 1
+
+        # The type is fixed for the burst: draw all of its values at once
+        i = self._burst_type_id
+        u = self._rng.random((2, self._anomaly_burst_remaining))
+        water = _ANOM_WATER_LO[i] + (_ANOM_WATER_HI[i] - _ANOM_WATER_LO[i]) * u[0]
+        gas = _ANOM_GAS_LO[i] + (_ANOM_GAS_HI[i] - _ANOM_GAS_LO[i]) * u[1]
+        self._burst_water = water.tolist()
+        self._burst_gas = gas.tolist()
+        self._burst_pos = 0
 
     @property
     def stats(self):
         return {
             "readings": self._read_count,
             "queue_size": self.data_queue.qsize(),
+            "dropped": self.data_queue.dropped,
             "anomaly_active": self._anomaly_burst_remaining > 0,
-            "current_anomaly_type": self._current_anomaly_type,
+            "current_anomaly_type": _ID_TO_NAME[self._burst_type_id if self._anomaly_burst_remaining
+                                                else self._current_anomaly_id],
         }
+
+
+class AsyncSensorSimulator(SensorSimulator):
+    """
+    SensorSimulator driven by an asyncio event loop instead of a thread.
+
+    Each reading is a loop callback scheduled at the next deadline, so any
+    number of simulators can run on one loop thread. Readings still go to
+    data_queue, which consumers on other threads drain as usual.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop = None
+        self._handle = None
+        self._phase = 0.0
+        self._deadline = 0.0
+
+    def start(self, loop=None):
+        """
+        Start generating readings on loop.
+
+        Without a loop argument this must be called from the loop's own
+        thread (e.g. inside a coroutine). It is safe to call from any thread
+        when the loop is passed.
+        """
+        self._loop = loop or asyncio.get_running_loop()
+        self._running = True
+        warm_up()
+        self._loop.call_soon_threadsafe(self._first_tick)
+        logger.info(f"Async sensor simulator started (interval={self.interval}s)")
+
+    def stop(self):
+        """Stop the simulator (safe to call from any thread)."""
+        self._running = False
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._cancel)
+        logger.info("Async sensor simulator stopped")
+
+    def _cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _first_tick(self):
+        self._deadline = self._loop.time()
+        self._tick()
+
+    def _tick(self):
+        """Generate one reading and schedule the next one (same pacing as _generate_loop)."""
+        if not self._running:
+            return
+        try:
+            self._phase += PHASE_STEP
+            self.data_queue.put(self._generate_reading(self._phase))
+            self._read_count += 1
+
+            self._deadline += self.interval
+            now = self._loop.time()
+            if now - self._deadline > MAX_LAG_INTERVALS * self.interval:
+                self._deadline = now
+        except Exception as e:
+            logger.error(f"Simulator error: {e}")
+            self._deadline = self._loop.time() + 1
+
+        self._handle = self._loop.call_at(self._deadline, self._tick)
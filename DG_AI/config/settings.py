@@ -4,6 +4,7 @@ All system constants, thresholds, and paths consolidated here.
 """
 
 import os
+from typing import Final
 
 # ─── Paths ────────────────────────────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -12,8 +13,10 @@ MODEL_DIR = os.path.join(BASE_DIR, "ai_model")
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 
 SENSOR_DATA_CSV = os.path.join(DATA_DIR, "sensor_data.csv")
+SENSOR_DATA_ARROW = os.path.join(DATA_DIR, "sensor_data.arrow")  # Memory-mappable copy (optional)
 LIVE_DATA_CSV = os.path.join(DATA_DIR, "live_data.csv")
 ALERT_LOG_CSV = os.path.join(DATA_DIR, "alert_log.csv")
+LIVE_SUMMARY_JSON = os.path.join(DATA_DIR, "live_summary.json")  # Rolling KPIs for the dashboard
 MODEL_PATH = os.path.join(MODEL_DIR, "model.pkl")
 
 # ─── Serial / Hardware ───────────────────────────────────────────────────────
@@ -22,26 +25,31 @@ SERIAL_BAUD = 115200
 SERIAL_TIMEOUT = 2             # seconds
 
 # ─── Sensor Thresholds ──────────────────────────────────────────────────────
+# Fixed for the life of the process (Final): the simulator bakes them into
+# precomputed tables and kernel arguments at import/start time.
 # Water Level (cm) – measured as distance from sensor to water surface
-WATER_LEVEL_MIN = 0.0          # Physical minimum
-WATER_LEVEL_MAX = 200.0        # Physical maximum
-WATER_LEVEL_NORMAL_LOW = 20.0  # Normal operating range
-WATER_LEVEL_NORMAL_HIGH = 60.0
-WATER_BLOCKAGE_THRESHOLD = 10.0   # Below this = blockage warning
-WATER_LEAKAGE_THRESHOLD = 100.0   # Above this = leakage warning
+WATER_LEVEL_MIN: Final = 0.0              # Physical minimum
+WATER_LEVEL_MAX: Final = 200.0            # Physical maximum
+WATER_LEVEL_NORMAL_LOW: Final = 20.0      # Normal operating range
+WATER_LEVEL_NORMAL_HIGH: Final = 60.0
+WATER_BLOCKAGE_THRESHOLD: Final = 10.0    # Below this = blockage warning
+WATER_LEAKAGE_THRESHOLD: Final = 100.0    # Above this = leakage warning
 
 # Gas Level (ADC 0-4095 for ESP32 12-bit)
-GAS_LEVEL_MIN = 0
-GAS_LEVEL_MAX = 4095
-GAS_NORMAL_MAX = 800
-GAS_WARNING_THRESHOLD = 1500
-GAS_DANGER_THRESHOLD = 2500
+GAS_LEVEL_MIN: Final = 0
+GAS_LEVEL_MAX: Final = 4095
+GAS_NORMAL_MAX: Final = 800
+GAS_WARNING_THRESHOLD: Final = 1500
+GAS_DANGER_THRESHOLD: Final = 2500
 
 # ─── AI Model Hyperparameters ────────────────────────────────────────────────
 ISOLATION_FOREST_ESTIMATORS = 200
 ISOLATION_FOREST_CONTAMINATION = 0.08
 FEATURE_ROLLING_WINDOW = 10       # Window size for rolling stats
 ANOMALY_COOLDOWN_SECONDS = 60     # Suppress repeated alerts within this window
+INFERENCE_BATCH_SIZE = 64         # Max queued readings scored per model call
+INFERENCE_N_JOBS = -1             # Parallel tree scoring for large batches (-1 = all cores)
+INFERENCE_PARALLEL_MIN_BATCH = 500  # Below this, scoring stays sequential
 
 # ─── Risk Classification ─────────────────────────────────────────────────────
 RISK_LEVELS = {
@@ -61,9 +69,10 @@ RISK_TYPES = [
 ]
 
 # ─── Simulator ────────────────────────────────────────────────────────────────
-SIMULATOR_INTERVAL = 1.0          # Seconds between simulated readings
-SIMULATOR_ANOMALY_RATE = 0.08     # 8% chance of anomaly per reading
-SIMULATOR_BURST_DURATION = 10     # Number of readings in an anomaly burst
+SIMULATOR_INTERVAL: Final = 1.0           # Seconds between simulated readings
+SIMULATOR_ANOMALY_RATE: Final = 0.08      # 8% chance of anomaly per reading
+SIMULATOR_BURST_DURATION: Final = 10      # Number of readings in an anomaly burst
+SIMULATOR_BATCH_SIZE: Final = 64          # Normal readings pre-generated per batch
 
 # ─── Dashboard ────────────────────────────────────────────────────────────────
 DASHBOARD_REFRESH_SECONDS = 2
@@ -6,23 +6,28 @@ Usage:
     streamlit run dashboard/app.py
 """
 
-import os, sys, time, subprocess, signal
+import os, io, sys, json, time, subprocess, signal, functools
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
 import plotly.express as px
 from plotly.subplots import make_subplots
 import streamlit as st
 from datetime import datetime, timedelta
 
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional: training data is then read from CSV
+    feather = None
 
 from config.settings import (
-    LIVE_DATA_CSV, ALERT_LOG_CSV, SENSOR_DATA_CSV,
+    LIVE_DATA_CSV, ALERT_LOG_CSV, LIVE_SUMMARY_JSON, SENSOR_DATA_CSV, SENSOR_DATA_ARROW,
     DASHBOARD_REFRESH_SECONDS, DASHBOARD_MAX_POINTS,
     WATER_BLOCKAGE_THRESHOLD, WATER_LEAKAGE_THRESHOLD,
     GAS_WARNING_THRESHOLD, GAS_DANGER_THRESHOLD,
     WATER_LEVEL_NORMAL_LOW, WATER_LEVEL_NORMAL_HIGH,
-    RISK_LEVELS, MODEL_PATH,
+    RISK_LEVELS, RISK_TYPES, MODEL_PATH,
 )
 
 st.set_page_config(
@@ -224,6 +229,11 @@ st.markdown("""
 }
 
 /* System Health */
+.health-grid {
+    display: grid;
+    grid-template-columns: repeat(3, 1fr);
+    gap: 1rem;
+}
 .health-card {
     background: rgba(30,41,59,0.4);
     border: 1px solid rgba(100,116,139,0.1);
@@ -273,62 +283,193 @@ header {visibility: hidden;}
 
 
 # ─── Data Loading ────────────────────────────────────────────
-def load_live_data(ttl_seconds=DASHBOARD_REFRESH_SECONDS):
-    """Load live data with configurable cache TTL (#13: respects slider)."""
-    @st.cache_data(ttl=ttl_seconds)
-    def _load(ttl_key):
-        try:
-            if os.path.exists(LIVE_DATA_CSV):
-                df = pd.read_csv(LIVE_DATA_CSV)
-                if len(df) > 0:
-                    df["timestamp"] = pd.to_datetime(df["timestamp"])
-                    return df.tail(DASHBOARD_MAX_POINTS)
-        except Exception:
-            pass
-        return pd.DataFrame()
-    return _load(ttl_seconds)
+# Column dtypes per CSV (timestamp is parsed separately). Fixed category sets
+# keep the dtype stable when incrementally read chunks are concatenated.
+RISK_LEVEL_DTYPE = pd.CategoricalDtype(list(RISK_LEVELS))
+RISK_TYPE_DTYPE = pd.CategoricalDtype(RISK_TYPES)
+LIVE_SCHEMA = {
+    "water_level_cm": "float32", "gas_level": "int16", "is_anomaly": "int8",
+    "risk_score": "float32", "risk_level": RISK_LEVEL_DTYPE, "anomaly_type": RISK_TYPE_DTYPE,
+}
+ALERT_SCHEMA = {
+    "anomaly_type": RISK_TYPE_DTYPE, "risk_score": "float32", "risk_level": RISK_LEVEL_DTYPE,
+    "water_level_cm": "float32", "gas_level": "int16", "message": "str",
+}
+TRAINING_SCHEMA = {"water_level_cm": "float32", "gas_level": "int16", "is_anomaly": "int8"}
+
+
+# Whole-file reads use Arrow's multithreaded CSV parser when pyarrow is
+# installed; small incremental chunks stay on the C engine (less overhead)
+BULK_CSV_ENGINE = "pyarrow" if feather is not None else "c"
+
+
+def _csv_options(schema, engine="c"):
+    """pd.read_csv keyword arguments for a schema above."""
+    options = dict(usecols=["timestamp", *schema], dtype=schema, parse_dates=["timestamp"], engine=engine)
+    if engine == "c":
+        options["date_format"] = "ISO8601"  # The pyarrow engine parses ISO 8601 natively
+    return options
+
+
+def _read_csv_tail(path, state_key, max_rows, schema):
+    """
+    Return the last max_rows rows of an append-only CSV, parsing only new bytes.
+
+    The byte offset and cached tail are kept in st.session_state[state_key].
+    A replaced, truncated or rewritten file (rotation, reset) is read again in
+    full. A file truncated in place and regrown past the offset is caught by
+    comparing its header and first row with the ones seen before.
+    """
+    stat = os.stat(path)
+    state = st.session_state.get(state_key)
+    with open(path, "rb") as f:
+        if (state is None or state["ino"] != stat.st_ino or stat.st_size < state["pos"]
+                or f.read(len(state["head"])) != state["head"]):
+            state = {"ino": stat.st_ino, "pos": 0, "head": b"", "names": None, "df": None}
+            st.session_state[state_key] = state
+
+        if stat.st_size > state["pos"]:
+            f.seek(state["pos"])
+            data = f.read(stat.st_size - state["pos"])
+            end = data.rfind(b"\n") + 1  # Complete rows only; a partial row is read next time
+            if end:
+                try:
+                    chunk = io.BytesIO(data[:end])
+                    if state["names"] is None:
+                        state["names"] = data[:data.find(b"\n")].decode().strip().split(",")
+                        new = pd.read_csv(chunk, **_csv_options(schema, BULK_CSV_ENGINE))
+                    else:
+                        new = pd.read_csv(chunk, header=None, names=state["names"], **_csv_options(schema))
+                except Exception:
+                    del st.session_state[state_key]  # Start over from the top next time
+                    raise
+                df = new if state["df"] is None else pd.concat([state["df"], new], ignore_index=True)
+                state["df"] = df.tail(max_rows)
+                state["pos"] += end
+
+        # Fingerprint: the header plus the first data row once there is one
+        if state["head"].count(b"\n") < 2 and state["pos"]:
+            f.seek(0)
+            start = f.read(min(state["pos"], 1 << 16))
+            second = start.find(b"\n", start.find(b"\n") + 1)
+            state["head"] = start[:second + 1] if second != -1 else start
+
+    return state["df"] if state["df"] is not None else pd.DataFrame()
+
+
+def _time_ordered(df):
+    """Return df sorted by timestamp unless it already is (callers read the span from its ends)."""
+    if df["timestamp"].is_monotonic_increasing:
+        return df
+    return df.sort_values("timestamp", kind="stable", ignore_index=True)
+
+
+def load_live_data():
+    """Load the latest live readings, reading only rows appended since the last refresh."""
+    try:  # A missing file raises from the reader's stat call
+        df = _read_csv_tail(LIVE_DATA_CSV, "live_tail", DASHBOARD_MAX_POINTS, LIVE_SCHEMA)
+        if len(df) > 0:
+            return _time_ordered(df)
+    except Exception:
+        pass
+    return pd.DataFrame()
 
 
-def load_alerts(ttl_seconds=DASHBOARD_REFRESH_SECONDS):
-    """Load alerts with configurable cache TTL (#13: respects slider)."""
-    @st.cache_data(ttl=ttl_seconds)
-    def _load(ttl_key):
-        try:
-            if os.path.exists(ALERT_LOG_CSV):
-                df = pd.read_csv(ALERT_LOG_CSV)
-                if len(df) > 0:
-                    df["timestamp"] = pd.to_datetime(df["timestamp"])
-                    return df.tail(50)
-        except Exception:
-            pass
-        return pd.DataFrame()
-    return _load(ttl_seconds)
+def load_alerts():
+    """Load the latest alerts, reading only rows appended since the last refresh."""
+    try:
+        df = _read_csv_tail(ALERT_LOG_CSV, "alerts_tail", 50, ALERT_SCHEMA)
+        if len(df) > 0:
+            return df
+    except Exception:
+        pass
+    return pd.DataFrame()
+
+
+def load_live_summary():
+    """Rolling anomaly summary written by the backend logger, or None if unavailable."""
+    try:
+        with open(LIVE_SUMMARY_JSON) as f:
+            summary = json.load(f)
+        return summary if summary.get("timestamp") else None
+    except (OSError, ValueError):
+        return None
+
+
+def _training_arrow_path():
+    """
+    Return an up-to-date Arrow (Feather v2) copy of the training CSV, or None.
+
+    The copy is written uncompressed so it can be memory-mapped, and rebuilt
+    whenever the CSV is newer. Needs pyarrow and a writable data directory.
+    """
+    if feather is None:
+        return None
+    try:
+        if (not os.path.exists(SENSOR_DATA_ARROW)
+                or os.path.getmtime(SENSOR_DATA_ARROW) < os.path.getmtime(SENSOR_DATA_CSV)):
+            df = pd.read_csv(SENSOR_DATA_CSV, **_csv_options(TRAINING_SCHEMA, BULK_CSV_ENGINE))
+            feather.write_feather(df, SENSOR_DATA_ARROW, compression="uncompressed")
+        return SENSOR_DATA_ARROW
+    except Exception:
+        return None
 
 
 @st.cache_data(ttl=60)
 def load_training_data():
     try:
         if os.path.exists(SENSOR_DATA_CSV):
-            df = pd.read_csv(SENSOR_DATA_CSV)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            return df
+            arrow_path = _training_arrow_path()
+            if arrow_path is not None:
+                # Native column types: no text parsing or datetime conversion
+                return _time_ordered(feather.read_table(arrow_path, memory_map=True).to_pandas())
+            return _time_ordered(pd.read_csv(SENSOR_DATA_CSV, **_csv_options(TRAINING_SCHEMA)))
     except Exception:
         pass
     return pd.DataFrame()
 
 
+@st.cache_data(ttl=DASHBOARD_REFRESH_SECONDS, show_spinner=False)
+def file_stat(path):
+    """(exists, size in bytes, mtime) of a file, stat-ed at most once per refresh interval."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False, 0, 0.0
+    return True, stat.st_size, stat.st_mtime
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_model_package(path, mtime):
+    """Trained model package, deserialized once per process; mtime keys the cache so a retrained model reloads."""
+    import joblib
+    return joblib.load(path)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def read_file_bytes(path, mtime):
+    """Raw file contents for a download button; mtime keys the cache so only changed files are re-read."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
 # ─── Sparkline Generator ────────────────────────────────────
 def make_sparkline_svg(values, color="#3b82f6", width=120, height=30):
     if len(values) < 2:
         return ""
-    vals = list(values[-30:])
-    mn, mx = min(vals), max(vals)
+    vals = np.asarray(values[-30:], dtype=np.float64)
+    # Keyed on the raw tail bytes: an unchanged tail reuses the rendered SVG
+    return _sparkline_svg(vals.tobytes(), color, width, height)
+
+
+@functools.lru_cache(maxsize=64)
+def _sparkline_svg(raw, color, width, height):
+    vals = np.frombuffer(raw, dtype=np.float64)
+    mn, mx = vals.min(), vals.max()
     rng = mx - mn if mx != mn else 1
-    points = []
-    for i, v in enumerate(vals):
-        x = (i / (len(vals) - 1)) * width
-        y = height - ((v - mn) / rng) * (height - 4) - 2
-        points.append(f"{x:.1f},{y:.1f}")
+    xs = np.linspace(0, width, vals.size)
+    ys = height - ((vals - mn) / rng) * (height - 4) - 2
+    points = np.char.add(np.char.add(np.char.mod("%.1f", xs), ","), np.char.mod("%.1f", ys)).tolist()
     path = " ".join(points)
     gradient_id = f"sg_{hash(color) % 10000}"
     return f'''<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">
@@ -353,8 +494,34 @@ CHART_LAYOUT = dict(
     legend=dict(orientation="h", yanchor="bottom", y=1.02, font=dict(color="#94a3b8", size=10)),
 )
 
+# Registered once as a template layered on Plotly's default; charts reference
+# it by name instead of splatting CHART_LAYOUT into every update_layout call
+pio.templates["drainguard"] = go.layout.Template(layout=CHART_LAYOUT)
+CHART_TEMPLATE = "plotly+drainguard"
+
+
+def _frame_fingerprint(df):
+    """Cache key for a chart's data window: its size, columns and a hash of its contents."""
+    if len(df) == 0:
+        return (0, tuple(df.columns))
+    return (len(df), tuple(df.columns), hash(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()))
+
+
+# Chart builders are memoized on that fingerprint, so an unchanged window skips
+# figure construction on reruns (and for other sessions viewing the same data)
+cache_chart = st.cache_data(max_entries=16, show_spinner=False,
+                            hash_funcs={pd.DataFrame: _frame_fingerprint})
+
 
-def create_water_level_chart(df):
+def anomaly_rows(df):
+    """Rows of df flagged as anomalous (empty if df has no is_anomaly column)."""
+    if "is_anomaly" not in df.columns:
+        return df.iloc[:0]
+    return df[df["is_anomaly"].to_numpy(dtype=bool)]
+
+
+@cache_chart
+def create_water_level_chart(df, anomalies):
     fig = go.Figure()
     fig.add_hrect(y0=0, y1=WATER_BLOCKAGE_THRESHOLD,
                   fillcolor="rgba(239,68,68,0.06)", line_width=0,
@@ -367,9 +534,10 @@ def create_water_level_chart(df):
     fig.add_hrect(y0=WATER_LEVEL_NORMAL_LOW, y1=WATER_LEVEL_NORMAL_HIGH,
                   fillcolor="rgba(34,197,94,0.04)", line_width=0)
 
-    fig.add_trace(go.Scatter(
+    # Dense series render through WebGL; the sparse overlays below stay SVG
+    fig.add_trace(go.Scattergl(
         x=df["timestamp"], y=df["water_level_cm"],
-        mode="lines", line=dict(color="#3b82f6", width=2, shape="spline"),
+        mode="lines", line=dict(color="#3b82f6", width=2),
         fill="tozeroy", fillcolor="rgba(59,130,246,0.06)",
         name="Water Level",
         hovertemplate="<b>%{x}</b><br>Water: %{y:.1f} cm<extra></extra>",
@@ -377,18 +545,20 @@ def create_water_level_chart(df):
 
     # Trend prediction (SMA)
     if len(df) > 20:
-        sma = df["water_level_cm"].rolling(10, min_periods=1).mean()
-        last_trend = sma.iloc[-10:].values
-        slope = (last_trend[-1] - last_trend[0]) / len(last_trend)
-        future_x = pd.date_range(df["timestamp"].iloc[-1], periods=15, freq="2s")
-        future_y = [last_trend[-1] + slope * i for i in range(15)]
+        # Slope of the 10-point SMA over its last 10 values; those two SMA
+        # points only need the last 19 readings, not a full rolling pass
+        tail = df["water_level_cm"].to_numpy(dtype=np.float64)[-19:]
+        sma_first, sma_last = tail[:10].mean(), tail[-10:].mean()
+        slope = (sma_last - sma_first) / 10
+        steps = np.arange(15)
+        future_x = df["timestamp"].iat[-1] + pd.to_timedelta(steps * 2, unit="s")
+        future_y = sma_last + slope * steps
         fig.add_trace(go.Scatter(
             x=future_x, y=future_y,
             mode="lines", line=dict(color="#60a5fa", width=1.5, dash="dot"),
             name="Trend", showlegend=True,
         ))
 
-    anomalies = df[df["is_anomaly"] == 1]
     if len(anomalies) > 0:
         fig.add_trace(go.Scatter(
             x=anomalies["timestamp"], y=anomalies["water_level_cm"],
@@ -398,13 +568,14 @@ def create_water_level_chart(df):
             name="Anomaly",
         ))
 
-    fig.update_layout(**CHART_LAYOUT, height=320,
+    fig.update_layout(template=CHART_TEMPLATE, height=320,
                       title=dict(text="💧 Water Level (cm)", font=dict(size=13, color="#e2e8f0")),
                       yaxis_title="cm")
     return fig
 
 
-def create_gas_level_chart(df):
+@cache_chart
+def create_gas_level_chart(df, anomalies):
     fig = go.Figure()
     fig.add_hrect(y0=GAS_DANGER_THRESHOLD, y1=4095,
                   fillcolor="rgba(239,68,68,0.08)", line_width=0,
@@ -416,24 +587,22 @@ def create_gas_level_chart(df):
                   annotation_font=dict(color="#eab308", size=9))
 
     # Color-code markers by gas level (#6: removed unused colors list)
-    marker_colors = [
-        "#ef4444" if v > GAS_DANGER_THRESHOLD
-        else "#eab308" if v > GAS_WARNING_THRESHOLD
-        else "#a855f7"
-        for v in df["gas_level"]
-    ]
+    gas = df["gas_level"].to_numpy()
+    marker_colors = np.select(
+        [gas > GAS_DANGER_THRESHOLD, gas > GAS_WARNING_THRESHOLD],
+        ["#ef4444", "#eab308"], default="#a855f7",
+    ).tolist()
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df["timestamp"], y=df["gas_level"],
         mode="lines+markers",
-        line=dict(color="#a855f7", width=2, shape="spline"),
+        line=dict(color="#a855f7", width=2),
         marker=dict(color=marker_colors, size=3),
         fill="tozeroy", fillcolor="rgba(168,85,247,0.05)",
         name="Gas Level",
         hovertemplate="<b>%{x}</b><br>Gas: %{y} ADC<extra></extra>",
     ))
 
-    anomalies = df[df["is_anomaly"] == 1]
     if len(anomalies) > 0:
         fig.add_trace(go.Scatter(
             x=anomalies["timestamp"], y=anomalies["gas_level"],
@@ -443,12 +612,13 @@ def create_gas_level_chart(df):
             name="Anomaly",
         ))
 
-    fig.update_layout(**CHART_LAYOUT, height=320,
+    fig.update_layout(template=CHART_TEMPLATE, height=320,
                       title=dict(text="🌫️ Gas Concentration (ADC)", font=dict(size=13, color="#e2e8f0")),
                       yaxis_title="ADC")
     return fig
 
 
+@st.cache_data(max_entries=16, show_spinner=False)
 def create_risk_gauge(risk_score, risk_level):
     color = RISK_LEVELS.get(risk_level, {}).get("color", "#64748b")
     fig = go.Figure(go.Indicator(
@@ -477,6 +647,7 @@ def create_risk_gauge(risk_score, risk_level):
     return fig
 
 
+@cache_chart
 def create_risk_timeline(df):
     if "risk_score" not in df.columns:
         return go.Figure()
@@ -492,31 +663,37 @@ def create_risk_timeline(df):
                   annotation_text="HIGH", annotation_font=dict(color="#ef4444", size=9))
     fig.add_hline(y=50, line_dash="dash", line_color="rgba(249,115,22,0.3)",
                   annotation_text="MODERATE", annotation_font=dict(color="#f97316", size=9))
-    layout = {**CHART_LAYOUT}
-    layout["yaxis"] = dict(range=[0, 105], title="%", gridcolor="rgba(51,65,85,0.2)", color="#64748b")
-    fig.update_layout(**layout, height=260,
+    fig.update_layout(template=CHART_TEMPLATE, height=260,
                       title=dict(text="📈 Risk Timeline (%)", font=dict(size=13, color="#e2e8f0")))
+    fig.update_yaxes(range=[0, 105], title="%")
     return fig
 
 
-def create_anomaly_distribution(df):
+def anomaly_type_counts(df):
+    """Anomalous readings per anomaly type in df, or None if df has no anomaly_type column."""
     if "anomaly_type" not in df.columns:
+        return None
+    counts = df.loc[df["is_anomaly"] == 1, "anomaly_type"].value_counts()
+    return {t: int(n) for t, n in counts.items() if n > 0}  # Categoricals count unused types too
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def create_anomaly_distribution(counts):
+    if counts is None:
         return go.Figure()
-    anomalies = df[df["is_anomaly"] == 1]
-    if len(anomalies) == 0:
+    if not counts:
         fig = go.Figure()
         fig.add_annotation(text="No anomalies", x=0.5, y=0.5, showarrow=False,
                           font=dict(color="#475569", size=14))
         fig.update_layout(height=260, paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
         return fig
 
-    counts = anomalies["anomaly_type"].value_counts()
     colors_map = {"BLOCKAGE": "#3b82f6", "LEAKAGE": "#f97316",
                   "GAS_HAZARD": "#a855f7", "FLOOD_RISK": "#ef4444", "NORMAL": "#22c55e"}
 
     fig = go.Figure(go.Pie(
-        labels=counts.index, values=counts.values, hole=0.6,
-        marker=dict(colors=[colors_map.get(t, "#64748b") for t in counts.index],
+        labels=list(counts), values=list(counts.values()), hole=0.6,
+        marker=dict(colors=[colors_map.get(t, "#64748b") for t in counts],
                     line=dict(color="#0a0f24", width=2)),
         textfont=dict(color="#e2e8f0", size=11),
         hovertemplate="<b>%{label}</b><br>Count: %{value}<br>%{percent}<extra></extra>",
@@ -528,58 +705,115 @@ def create_anomaly_distribution(df):
     return fig
 
 
-def create_correlation_scatter(df):
+@cache_chart
+def create_correlation_scatter(df, anomalies):
     if len(df) < 2:
         return go.Figure()
     fig = go.Figure()
-    normal = df[df["is_anomaly"] == 0] if "is_anomaly" in df.columns else df
-    anomalies = df[df["is_anomaly"] == 1] if "is_anomaly" in df.columns else pd.DataFrame()
+    normal = df.drop(index=anomalies.index) if len(anomalies) > 0 else df
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=normal["water_level_cm"], y=normal["gas_level"],
         mode="markers", marker=dict(color="#3b82f6", size=5, opacity=0.4),
         name="Normal", hovertemplate="Water: %{x:.1f}cm<br>Gas: %{y}<extra></extra>",
     ))
     if len(anomalies) > 0:
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=anomalies["water_level_cm"], y=anomalies["gas_level"],
             mode="markers", marker=dict(color="#ef4444", size=8, opacity=0.8,
                                         symbol="diamond", line=dict(color="#fca5a5", width=1)),
             name="Anomaly",
         ))
-    fig.update_layout(**CHART_LAYOUT, height=320,
+    fig.update_layout(template=CHART_TEMPLATE, height=320,
                       title=dict(text="🔗 Sensor Correlation", font=dict(size=13, color="#e2e8f0")),
                       xaxis_title="Water Level (cm)", yaxis_title="Gas Level (ADC)")
     return fig
 
 
+@cache_chart
 def create_sensor_heatmap(df):
     if len(df) < 10 or "timestamp" not in df.columns:
         return go.Figure()
-    df_h = df.copy()
-    df_h["minute"] = df_h["timestamp"].dt.minute
-    df_h["time_bin"] = df_h["timestamp"].dt.strftime("%H:%M")
-
-    # Create bins of readings (#7: removed unused anomaly_count agg)
-    agg_dict = {
-        "water_mean": ("water_level_cm", "mean"),
-        "gas_mean": ("gas_level", "mean"),
-    }
-    bins = df_h.groupby("time_bin").agg(**agg_dict).tail(30)
+    # One bin per wall-clock minute, keyed on datetime64[m] (no copy or per-row strftime)
+    bin_key = df["timestamp"].to_numpy().astype("datetime64[m]")
+    bins = df[["water_level_cm", "gas_level"]].groupby(bin_key, sort=True).mean().tail(30)
 
     fig = go.Figure(go.Heatmap(
-        x=bins.index,
+        x=bins.index.strftime("%H:%M"),
         y=["Water Level", "Gas Level"],
-        z=[bins["water_mean"].values, bins["gas_mean"].values],
+        z=[bins["water_level_cm"].values, bins["gas_level"].values],
         colorscale=[[0, "#0f172a"], [0.3, "#1e3a5f"], [0.6, "#3b82f6"], [0.8, "#f97316"], [1, "#ef4444"]],
         hovertemplate="Time: %{x}<br>%{y}: %{z:.1f}<extra></extra>",
     ))
-    layout = {**CHART_LAYOUT, "yaxis": dict(gridcolor="rgba(51,65,85,0.2)", color="#64748b")}
-    fig.update_layout(**layout, height=200,
+    fig.update_layout(template=CHART_TEMPLATE, height=200,
                       title=dict(text="🗺️ Sensor Heatmap", font=dict(size=13, color="#e2e8f0")))
     return fig
 
 
+# ─── Statistical Summary ─────────────────────────────────────
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs={pd.DataFrame: _frame_fingerprint})
+def summary_stats(df):
+    """Analytics-tab figures for df, from a single df.agg call."""
+    spec = {"water_level_cm": ["mean", "std"], "gas_level": ["mean", "std"]}
+    if "is_anomaly" in df.columns:
+        spec["is_anomaly"] = ["sum"]
+    agg = df.agg(spec)
+    return {
+        "water_mean": agg.at["mean", "water_level_cm"],
+        "water_std": agg.at["std", "water_level_cm"],
+        "gas_mean": agg.at["mean", "gas_level"],
+        "gas_std": agg.at["std", "gas_level"],
+        "anomalies": int(agg.at["sum", "is_anomaly"]) if "is_anomaly" in spec else None,
+        # Rows are in time order, so the span needs only the first and last stamps
+        "span_seconds": (df["timestamp"].iloc[-1] - df["timestamp"].iloc[0]).total_seconds(),
+    }
+
+
+# ─── Card Templates ──────────────────────────────────────────
+_ALERT_TMPL = """<div class="alert-card-v2 {css}">
+<div style="display:flex;justify-content:space-between;align-items:center;">
+<span style="font-weight:700;color:#e2e8f0;">{icon} {anomaly_type}</span>
+<span style="color:#94a3b8;font-size:0.8rem;">{ts}</span>
+</div>
+<div class="alert-meta">
+Risk: <b style="color:{risk_color}">{risk_score:.0f}%</b> •
+Water: {water_level_cm:.1f}cm •
+Gas: {gas_level}
+</div>
+<div style="color:#94a3b8;font-size:0.8rem;margin-top:4px;">{message}</div>
+</div>"""
+_ALERT_ICONS = {"critical": "🔴", "high": "🟠", "moderate": "🟡"}
+ALERT_PAGE_SIZES = (5, 15, 50)  # Alert cards shown; load_alerts keeps the last 50
+_HEALTH_CARD_TMPL = """<div class="health-card">
+<div class="health-label">{0}</div>
+<div class="health-value">{1}</div>
+<div style="color:#64748b;font-size:0.75rem;margin-top:4px;">{2}</div>
+</div>"""
+
+
+def alert_cards_html(alerts, times):
+    """Render alert rows (with preformatted times) as one block of alert cards."""
+    cards = []
+    for row, ts in zip(alerts.to_dict("records"), times):
+        severity = str(row.get("risk_level", "LOW")).lower()
+        cards.append(_ALERT_TMPL.format_map({
+            "anomaly_type": "UNKNOWN", "risk_score": 0, "water_level_cm": 0, "gas_level": 0,
+            "message": "",
+            **row,
+            "css": f"alert-{severity}" if severity in _ALERT_ICONS else "alert-low",
+            "icon": _ALERT_ICONS.get(severity, "🟢"),
+            "risk_color": RISK_LEVELS.get(severity.upper(), {}).get("color", "#64748b"),
+            "ts": ts,
+        }))
+    return "\n".join(cards)
+
+
+def health_cards_html(cards):
+    """Render (label, value, subtitle) tuples as one grid of health cards."""
+    body = "\n".join(_HEALTH_CARD_TMPL.format(*card) for card in cards)
+    return f'<div class="health-grid">\n{body}\n</div>'
+
+
 # ─── Sidebar ─────────────────────────────────────────────────
 def render_sidebar():
     with st.sidebar:
@@ -636,49 +870,56 @@ def render_sidebar():
         st.markdown("---")
         st.markdown("### ℹ️ System Info")
         st.markdown(f"**Time:** {datetime.now().strftime('%H:%M:%S')}")
-        if os.path.exists(LIVE_DATA_CSV):
-            size = os.path.getsize(LIVE_DATA_CSV) / 1024
-            st.markdown(f"**Live CSV:** {size:.1f} KB")
-        if os.path.exists(MODEL_PATH):
-            model_size = os.path.getsize(MODEL_PATH) / 1024
-            st.markdown(f"**Model:** {model_size:.0f} KB")
+        live_exists, live_size, live_mtime = file_stat(LIVE_DATA_CSV)
+        if live_exists:
+            st.markdown(f"**Live CSV:** {live_size / 1024:.1f} KB")
+        model_exists, model_size, _ = file_stat(MODEL_PATH)
+        if model_exists:
+            st.markdown(f"**Model:** {model_size / 1024:.0f} KB")
 
         # Data export
         st.markdown("---")
         st.markdown("### 📥 Export")
-        if os.path.exists(LIVE_DATA_CSV):
-            with open(LIVE_DATA_CSV, "r") as f:
-                st.download_button("📄 Download Live Data", f.read(), "drainguard_live_data.csv", "text/csv",
-                                  use_container_width=True)
-        if os.path.exists(ALERT_LOG_CSV):
-            with open(ALERT_LOG_CSV, "r") as f:
-                st.download_button("🚨 Download Alerts", f.read(), "drainguard_alerts.csv", "text/csv",
-                                  use_container_width=True)
+        if live_exists:
+            st.download_button("📄 Download Live Data", read_file_bytes(LIVE_DATA_CSV, live_mtime),
+                               "drainguard_live_data.csv", "text/csv", use_container_width=True)
+        alert_exists, _, alert_mtime = file_stat(ALERT_LOG_CSV)
+        if alert_exists:
+            st.download_button("🚨 Download Alerts", read_file_bytes(ALERT_LOG_CSV, alert_mtime),
+                               "drainguard_alerts.csv", "text/csv", use_container_width=True)
 
         return data_mode, refresh_rate, max_points
 
 
 # ─── Main Layout ─────────────────────────────────────────────
-def main():
-    data_mode, refresh_rate, max_points = render_sidebar()
-
-    # Load data (#13: pass refresh_rate so cache TTL matches slider)
+def render_dashboard(data_mode, refresh_rate, max_points):
+    """Header, KPIs and tabs: the part of the page that changes on each refresh."""
+    # Load data (live files are read incrementally on every refresh)
     if data_mode == "Live Data":
-        df = load_live_data(ttl_seconds=refresh_rate)
+        df = load_live_data()
         data_label = "LIVE"
     else:
         df = load_training_data()
         data_label = "HISTORICAL"
-    alerts_df = load_alerts(ttl_seconds=refresh_rate)
+    alerts_df = load_alerts()
+    n_rows, n_alerts = len(df), len(alerts_df)  # Reused throughout the tabs
+
+    # Backend-maintained window summary; only trusted if it ends at df's last row
+    summary = load_live_summary() if data_mode == "Live Data" and n_rows > 0 else None
+    if summary is not None and pd.Timestamp(summary["timestamp"]) != df["timestamp"].iloc[-1]:
+        summary = None
 
     # Compute KPI values
-    if not df.empty:
+    if n_rows > 0:
         latest = df.iloc[-1]
         water_val = latest.get("water_level_cm", 0)
         gas_val = latest.get("gas_level", 0)
         risk_val = latest.get("risk_score", 0) if "risk_score" in df.columns else 0
         risk_level = latest.get("risk_level", "NORMAL") if "risk_level" in df.columns else "NORMAL"
-        total_anomalies = int(df["is_anomaly"].sum()) if "is_anomaly" in df.columns else 0
+        if summary is not None and summary["readings"] == n_rows:
+            total_anomalies = summary["anomalies"]
+        else:
+            total_anomalies = int(df["is_anomaly"].sum()) if "is_anomaly" in df.columns else 0
     else:
         water_val = gas_val = risk_val = total_anomalies = 0
         risk_level = "NORMAL"
@@ -703,22 +944,24 @@ def main():
                 <span class="pulse-dot {pulse_class}"></span>
                 <span style="color:#94a3b8;font-weight:600;font-size:0.85rem;">{pulse_label}</span>
                 <span style="color:#475569;font-size:0.8rem;margin-left:12px;">
-                    {datetime.now().strftime('%H:%M:%S')} • {len(df):,} readings
+                    {datetime.now().strftime('%H:%M:%S')} • {n_rows:,} readings
                 </span>
             </div>
         </div>
     </div>
     """, unsafe_allow_html=True)
 
-    if df.empty:
+    if n_rows == 0:
         st.info("📡 No data available. Start the backend using **▶ Start** in the sidebar, or switch to **Training Data**.")
         training_df = load_training_data()
         if not training_df.empty:
+            preview = training_df.tail(500)
+            preview_anomalies = anomaly_rows(preview)
             c1, c2 = st.columns(2)
             with c1:
-                st.plotly_chart(create_water_level_chart(training_df.tail(500)), use_container_width=True)
+                st.plotly_chart(create_water_level_chart(preview, preview_anomalies), use_container_width=True)
             with c2:
-                st.plotly_chart(create_gas_level_chart(training_df.tail(500)), use_container_width=True)
+                st.plotly_chart(create_gas_level_chart(preview, preview_anomalies), use_container_width=True)
         return
 
     # Color coding
@@ -727,9 +970,9 @@ def main():
     risk_color = RISK_LEVELS.get(risk_level, {}).get("color", "#64748b")
 
     # Sparklines
-    water_spark = make_sparkline_svg(df["water_level_cm"].values, water_color) if len(df) > 2 else ""
-    gas_spark = make_sparkline_svg(df["gas_level"].values, gas_color) if len(df) > 2 else ""
-    risk_spark = make_sparkline_svg(df["risk_score"].values, risk_color) if "risk_score" in df.columns and len(df) > 2 else ""
+    water_spark = make_sparkline_svg(df["water_level_cm"].values, water_color) if n_rows > 2 else ""
+    gas_spark = make_sparkline_svg(df["gas_level"].values, gas_color) if n_rows > 2 else ""
+    risk_spark = make_sparkline_svg(df["risk_score"].values, risk_color) if "risk_score" in df.columns and n_rows > 2 else ""
 
     # ─── KPI Row ─────────────────────────────────────────
     k1, k2, k3, k4, k5 = st.columns(5)
@@ -738,7 +981,7 @@ def main():
         (k2, "gas", "🌫️", "GAS LEVEL", f"{int(gas_val)}", "ADC", gas_color, gas_spark),
         (k3, "risk", "⚠️", "RISK SCORE", f"{risk_val:.0f}%", risk_level, risk_color, risk_spark),
         (k4, "anomaly", "🚨", "ANOMALIES", str(total_anomalies), "detected", "#ef4444", ""),
-        (k5, "readings", "📊", "READINGS", f"{len(df):,}", data_label, "#22c55e", ""),
+        (k5, "readings", "📊", "READINGS", f"{n_rows:,}", data_label, "#22c55e", ""),
     ]:
         with col:
             st.markdown(f"""
@@ -753,6 +996,14 @@ def main():
 
     st.markdown("<br>", unsafe_allow_html=True)
 
+    # Chart window and its anomalous rows, computed once and shared by every chart below
+    df_view = df.iloc[-max_points:]
+    view_anomalies = anomaly_rows(df_view)
+    if summary is not None and summary["readings"] == len(df_view):
+        type_counts = summary["anomaly_types"]
+    else:
+        type_counts = anomaly_type_counts(df_view)
+
     # ─── Tabbed Layout ───────────────────────────────────
     tab1, tab2, tab3, tab4 = st.tabs(["📡 Live Monitor", "📊 Analytics", "🚨 Alerts", "🔧 System"])
 
@@ -760,88 +1011,76 @@ def main():
     with tab1:
         c1, c2 = st.columns(2)
         with c1:
-            st.plotly_chart(create_water_level_chart(df.tail(max_points)), use_container_width=True)
+            st.plotly_chart(create_water_level_chart(df_view, view_anomalies), use_container_width=True)
         with c2:
-            st.plotly_chart(create_gas_level_chart(df.tail(max_points)), use_container_width=True)
+            st.plotly_chart(create_gas_level_chart(df_view, view_anomalies), use_container_width=True)
 
         r1, r2, r3 = st.columns([2, 3, 2])
         with r1:
             st.plotly_chart(create_risk_gauge(risk_val, risk_level), use_container_width=True)
         with r2:
-            st.plotly_chart(create_risk_timeline(df.tail(max_points)), use_container_width=True)
+            st.plotly_chart(create_risk_timeline(df_view), use_container_width=True)
         with r3:
-            st.plotly_chart(create_anomaly_distribution(df), use_container_width=True)
+            st.plotly_chart(create_anomaly_distribution(type_counts), use_container_width=True)
 
     # ─── TAB 2: Analytics ────────────────────────────────
     with tab2:
         st.markdown('<div class="section-header">🔬 Deep Analysis</div>', unsafe_allow_html=True)
         a1, a2 = st.columns(2)
         with a1:
-            st.plotly_chart(create_correlation_scatter(df.tail(max_points)), use_container_width=True)
+            st.plotly_chart(create_correlation_scatter(df_view, view_anomalies), use_container_width=True)
         with a2:
-            st.plotly_chart(create_sensor_heatmap(df.tail(max_points)), use_container_width=True)
+            st.plotly_chart(create_sensor_heatmap(df_view), use_container_width=True)
 
         # Stats summary
         st.markdown('<div class="section-header">📋 Statistical Summary</div>', unsafe_allow_html=True)
+        stats = summary_stats(df)
         s1, s2, s3, s4 = st.columns(4)
         with s1:
-            st.metric("Avg Water Level", f"{df['water_level_cm'].mean():.1f} cm",
-                      f"σ = {df['water_level_cm'].std():.1f}")
+            st.metric("Avg Water Level", f"{stats['water_mean']:.1f} cm", f"σ = {stats['water_std']:.1f}")
         with s2:
-            st.metric("Avg Gas Level", f"{df['gas_level'].mean():.0f} ADC",
-                      f"σ = {df['gas_level'].std():.0f}")
+            st.metric("Avg Gas Level", f"{stats['gas_mean']:.0f} ADC", f"σ = {stats['gas_std']:.0f}")
         with s3:
-            anomaly_rate = (df["is_anomaly"].sum() / len(df) * 100) if "is_anomaly" in df.columns else 0
-            st.metric("Anomaly Rate", f"{anomaly_rate:.1f}%", f"{int(df['is_anomaly'].sum())} events" if "is_anomaly" in df.columns else "N/A")
+            events = stats["anomalies"]
+            anomaly_rate = events / n_rows * 100 if events is not None else 0
+            st.metric("Anomaly Rate", f"{anomaly_rate:.1f}%", f"{events} events" if events is not None else "N/A")
         with s4:
-            time_span = (df["timestamp"].max() - df["timestamp"].min()).total_seconds() / 60 if len(df) > 1 else 0
-            st.metric("Time Span", f"{time_span:.0f} min", f"{len(df):,} samples")
+            time_span = stats["span_seconds"] / 60 if n_rows > 1 else 0
+            st.metric("Time Span", f"{time_span:.0f} min", f"{n_rows:,} samples")
 
         # Data table
         with st.expander("📄 Raw Data (last 20 readings)", expanded=False):
-            st.dataframe(df.tail(20).iloc[::-1], use_container_width=True, height=300)
+            st.dataframe(df.iloc[:-21:-1], use_container_width=True, height=300)
 
     # ─── TAB 3: Alerts ───────────────────────────────────
     with tab3:
         st.markdown('<div class="section-header">🚨 Alert History</div>', unsafe_allow_html=True)
 
-        if not alerts_df.empty:
+        if n_alerts > 0:
+            alert_times = alerts_df["timestamp"].dt.strftime("%H:%M:%S").fillna("N/A")
+
             # Alert summary
             ac1, ac2, ac3 = st.columns(3)
             with ac1:
-                st.metric("Total Alerts", len(alerts_df))
+                st.metric("Total Alerts", n_alerts)
             with ac2:
                 critical = len(alerts_df[alerts_df["risk_level"].isin(["CRITICAL", "HIGH"])]) if "risk_level" in alerts_df.columns else 0
                 st.metric("Critical/High", critical)
             with ac3:
-                if len(alerts_df) > 0:
-                    last_ts = pd.to_datetime(alerts_df["timestamp"].iloc[-1]).strftime("%H:%M:%S")
-                    st.metric("Last Alert", last_ts)
+                st.metric("Last Alert", alert_times.iloc[-1])
 
             st.markdown("---")
 
-            for _, row in alerts_df.tail(15).iloc[::-1].iterrows():
-                severity = str(row.get("risk_level", "LOW")).lower()
-                css_class = f"alert-{severity}" if severity in ["critical", "high", "moderate"] else "alert-low"
-                icon = {"critical": "🔴", "high": "🟠", "moderate": "🟡"}.get(severity, "🟢")
-                ts = pd.to_datetime(row["timestamp"]).strftime("%H:%M:%S") if pd.notna(row.get("timestamp")) else "N/A"
-
-                st.markdown(f"""
-                <div class="alert-card-v2 {css_class}">
-                    <div style="display:flex;justify-content:space-between;align-items:center;">
-                        <span style="font-weight:700;color:#e2e8f0;">
-                            {icon} {row.get('anomaly_type', 'UNKNOWN')}
-                        </span>
-                        <span style="color:#94a3b8;font-size:0.8rem;">{ts}</span>
-                    </div>
-                    <div class="alert-meta">
-                        Risk: <b style="color:{RISK_LEVELS.get(severity.upper(), {}).get('color', '#64748b')}">{row.get('risk_score', 0):.0f}%</b> •
-                        Water: {row.get('water_level_cm', 0):.1f}cm •
-                        Gas: {row.get('gas_level', 0)}
-                    </div>
-                    <div style="color:#94a3b8;font-size:0.8rem;margin-top:4px;">{row.get('message', '')}</div>
-                </div>
-                """, unsafe_allow_html=True)
+            # Newest first, rendered as a single markdown element. The HTML is only
+            # rebuilt when a new alert arrives or the page size changes.
+            n = st.selectbox("Show", ALERT_PAGE_SIZES, index=0, key="alert_page_size")
+            cache_key = (n_alerts, alerts_df["timestamp"].iloc[-1], n)
+            cached = st.session_state.get("alert_cards")
+            if cached is None or cached[0] != cache_key:
+                newest = slice(None, -n - 1, -1)
+                cached = (cache_key, alert_cards_html(alerts_df.iloc[newest], alert_times.iloc[newest]))
+                st.session_state["alert_cards"] = cached
+            st.markdown(cached[1], unsafe_allow_html=True)
         else:
             st.success("✅ No alerts recorded. System operating normally.")
 
@@ -849,47 +1088,27 @@ def main():
     with tab4:
         st.markdown('<div class="section-header">🔧 System Health</div>', unsafe_allow_html=True)
 
-        h1, h2, h3 = st.columns(3)
-        with h1:
-            model_exists = os.path.exists(MODEL_PATH)
-            st.markdown(f"""
-            <div class="health-card">
-                <div class="health-label">AI Model</div>
-                <div class="health-value">{'✅ Loaded' if model_exists else '❌ Missing'}</div>
-                <div style="color:#64748b;font-size:0.75rem;margin-top:4px;">
-                    {'Isolation Forest – 200 estimators' if model_exists else 'Run train_model.py first'}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        with h2:
-            pipeline_status = "Active" if not df.empty and data_mode == "Live Data" else "Idle"
-            st.markdown(f"""
-            <div class="health-card">
-                <div class="health-label">Data Pipeline</div>
-                <div class="health-value">{'🟢' if pipeline_status == 'Active' else '⚪'} {pipeline_status}</div>
-                <div style="color:#64748b;font-size:0.75rem;margin-top:4px;">
-                    {f'{len(df):,} readings processed' if not df.empty else 'No data flowing'}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        with h3:
-            st.markdown(f"""
-            <div class="health-card">
-                <div class="health-label">Dashboard</div>
-                <div class="health-value">🟢 Running</div>
-                <div style="color:#64748b;font-size:0.75rem;margin-top:4px;">
-                    Refresh: {refresh_rate}s • Max points: {max_points}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        # All three cards go out as one markdown element laid out by a CSS grid
+        model_exists = file_stat(MODEL_PATH)[0]
+        pipeline_status = "Active" if n_rows > 0 and data_mode == "Live Data" else "Idle"
+        st.markdown(health_cards_html([
+            ("AI Model",
+             '✅ Loaded' if model_exists else '❌ Missing',
+             'Isolation Forest – 200 estimators' if model_exists else 'Run train_model.py first'),
+            ("Data Pipeline",
+             f"{'🟢' if pipeline_status == 'Active' else '⚪'} {pipeline_status}",
+             f'{n_rows:,} readings processed' if n_rows > 0 else 'No data flowing'),
+            ("Dashboard",
+             "🟢 Running",
+             f"Refresh: {refresh_rate}s • Max points: {max_points}"),
+        ]), unsafe_allow_html=True)
 
         st.markdown("<br>", unsafe_allow_html=True)
 
         # Model performance (if available)
         st.markdown('<div class="section-header">📊 Model Training Stats</div>', unsafe_allow_html=True)
         try:
-            import joblib
-            model_pkg = joblib.load(MODEL_PATH)
+            model_pkg = load_model_package(MODEL_PATH, file_stat(MODEL_PATH)[2])
             stats = model_pkg.get("training_stats", {})
             m1, m2, m3, m4 = st.columns(4)
             with m1:
@@ -917,19 +1136,19 @@ def main():
             ("Model File", MODEL_PATH),
         ]
         for name, path in files_info:
-            exists = os.path.exists(path)
-            size = f"{os.path.getsize(path)/1024:.1f} KB" if exists else "—"
+            exists, size_bytes, _ = file_stat(path)
+            size = f"{size_bytes/1024:.1f} KB" if exists else "—"
             status = "✅" if exists else "❌"
             st.markdown(f"{status} **{name}**: `{os.path.basename(path)}` ({size})")
 
-    # ─── Auto Refresh (#4: non-blocking refresh) ─────────
-    if data_mode == "Live Data":
-        import streamlit.components.v1 as components
-        # Use a short JS timer to trigger rerun without blocking the server thread
-        components.html(
-            f"<script>setTimeout(() => window.parent.postMessage({{type: 'streamlit:rerun'}}, '*'), {refresh_rate * 1000});</script>",
-            height=0,
-        )
+
+def main():
+    data_mode, refresh_rate, max_points = render_sidebar()
+
+    # Auto refresh: in live mode only the dashboard fragment reruns every
+    # refresh_rate seconds; the sidebar and injected CSS stay mounted
+    run_every = refresh_rate if data_mode == "Live Data" else None
+    st.fragment(run_every=run_every)(render_dashboard)(data_mode, refresh_rate, max_points)
 
 
 if __name__ == "__main__":
@@ -9,8 +9,15 @@ Usage:
 import os
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional: the placement loop then runs as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 from config.settings import (
     SENSOR_DATA_CSV, DATA_DIR,
@@ -53,28 +60,50 @@ ANOMALY_PROFILES = {
     },
 }
 
+# Profile tables for the compiled placement loop (same order as ANOMALY_PROFILES)
+_PROFILE_RANGES = np.array(
+    [[p["water_level_range"], p["gas_level_range"]] for p in ANOMALY_PROFILES.values()],
+    dtype=np.float64,
+)  # (profile, water/gas, low/high)
+_PROFILE_DURATIONS = np.array([p["duration"] for p in ANOMALY_PROFILES.values()], dtype=np.int64)
+
+BURST_ONSET_PROBABILITY = 0.03  # Chance a burst starts at any free sample
+BURST_GAP = (20, 60)            # Samples between bursts (rng.integers bounds)
+
 
 def generate_normal_data(n: int, rng: np.random.Generator) -> tuple:
-    """Generate normal operating sensor data with realistic noise."""
-    # Water level: sinusoidal daily pattern + noise (simulates tidal/usage cycles)
+    """Generate normal operating sensor data with realistic noise.
+
+    Arrays come back in their final dtypes (float32 water, int16 gas), so
+    anomaly injection and the DataFrame work on them without further casts.
+    """
+    # Two scratch buffers are reused for every intermediate (no temporaries)
     t = np.linspace(0, 8 * np.pi, n)
+    buf = np.empty(n)
+    noise = np.empty(n)
+
+    # Water level: sinusoidal daily pattern + noise (simulates tidal/usage cycles)
     water_base = (WATER_LEVEL_NORMAL_LOW + WATER_LEVEL_NORMAL_HIGH) / 2
     water_amplitude = (WATER_LEVEL_NORMAL_HIGH - WATER_LEVEL_NORMAL_LOW) / 3
-    water_level = (
-        water_base
-        + water_amplitude * np.sin(t)
-        + rng.normal(0, 2.0, n)  # ±2cm jitter
-    )
-    water_level = np.clip(water_level, 5.0, 90.0)
+    np.sin(t, out=buf)
+    buf *= water_amplitude
+    buf += water_base
+    rng.standard_normal(out=noise)
+    noise *= 2.0  # ±2cm jitter
+    buf += noise
+    water_level = np.empty(n, dtype=np.float32)
+    np.clip(buf, 5.0, 90.0, out=water_level, casting="same_kind")
 
     # Gas level: mostly stable with occasional mild fluctuations
     gas_base = 400.0
-    gas_level = (
-        gas_base
-        + 100 * np.sin(t * 0.7)
-        + rng.normal(0, 50.0, n)  # ±50 ADC noise
-    )
-    gas_level = np.clip(gas_level, 100, GAS_NORMAL_MAX + 100).astype(int)
+    np.multiply(t, 0.7, out=buf)
+    np.sin(buf, out=buf)
+    buf *= 100
+    buf += gas_base
+    rng.standard_normal(out=noise)
+    noise *= 50.0  # ±50 ADC noise
+    buf += noise
+    gas_level = np.clip(buf, 100, GAS_NORMAL_MAX + 100, out=buf).astype(np.int16)
 
     return water_level, gas_level
 
@@ -87,46 +116,65 @@ def inject_anomalies(
 ) -> np.ndarray:
     """Inject realistic anomaly bursts into sensor data."""
     n = len(water_level)
-    is_anomaly = np.zeros(n, dtype=int)
+    is_anomaly = np.zeros(n, dtype=np.int8)
     total_anomaly_target = int(n * target_anomaly_rate)
+
+    # Draw every random number the placement loop may need up front: a burst
+    # covers at least one sample plus a gap, which bounds the burst count
+    max_bursts = n // (BURST_GAP[0] + 1) + 1
+    onset = rng.random(n)
+    profile_idx = rng.integers(0, len(_PROFILE_RANGES), max_bursts)
+    durations = _PROFILE_DURATIONS[profile_idx]
+    burst_lens = rng.integers(durations[:, 0], durations[:, 1] + 1)
+    gaps = rng.integers(BURST_GAP[0], BURST_GAP[1], max_bursts)
+    targets = rng.random((n, 2))  # Per-sample (water, gas) blend targets in [0, 1)
+
+    _place_bursts(water_level, gas_level, is_anomaly, onset, profile_idx, burst_lens, gaps,
+                  targets, _PROFILE_RANGES, total_anomaly_target)
+    return is_anomaly
+
+
+@njit(cache=True)
+def _place_bursts(water_level, gas_level, is_anomaly, onset, profile_idx, burst_lens, gaps,
+                  targets, ranges, total_anomaly_target):
+    """Place anomaly bursts in place from pre-drawn randoms; returns the anomalous sample count."""
+    n = water_level.shape[0]
     anomaly_count = 0
+    burst = 0
     i = 0
 
     while i < n and anomaly_count < total_anomaly_target:
-        if rng.random() < 0.03 and is_anomaly[i] == 0:
-            # Pick a random anomaly profile
-            profile_name = rng.choice(list(ANOMALY_PROFILES.keys()))
-            profile = ANOMALY_PROFILES[profile_name]
+        if onset[i] < BURST_ONSET_PROBABILITY and is_anomaly[i] == 0:
+            p = profile_idx[burst]
+            end = min(i + burst_lens[burst], n)
 
-            # Determine burst duration
-            burst_len = rng.integers(profile["duration"][0], profile["duration"][1] + 1)
-            end = min(i + burst_len, n)
-
-            # Inject anomaly with gradual onset (ramp-in over first 30% of burst)
+            # Inject anomaly with gradual onset (ramp-in over first 30% of burst),
+            # trimmed so the target rate is never overshot
             ramp = end - i
             ramp_in = max(1, int(ramp * 0.3))
+            stop = i + min(ramp, total_anomaly_target - anomaly_count)
 
-            for j in range(i, end):
-                if anomaly_count >= total_anomaly_target:
-                    break  # Guard against overshooting the target rate
-
+            w_lo = ranges[p, 0, 0]
+            w_span = ranges[p, 0, 1] - w_lo
+            g_lo = ranges[p, 1, 0]
+            g_span = ranges[p, 1, 1] - g_lo
+            for j in range(i, stop):
                 progress = min(1.0, (j - i) / ramp_in)
 
                 # Blend from normal toward anomalous values
-                target_water = rng.uniform(*profile["water_level_range"])
-                target_gas = rng.uniform(*profile["gas_level_range"])
-
+                target_water = w_lo + w_span * targets[j, 0]
+                target_gas = g_lo + g_span * targets[j, 1]
                 water_level[j] = (1 - progress) * water_level[j] + progress * target_water
                 gas_level[j] = int((1 - progress) * gas_level[j] + progress * target_gas)
-
                 is_anomaly[j] = 1
-                anomaly_count += 1
 
-            i = end + rng.integers(20, 60)  # Gap before next anomaly
+            anomaly_count += stop - i
+            i = end + gaps[burst]  # Gap before next anomaly
+            burst += 1
         else:
             i += 1
 
-    return is_anomaly
+    return anomaly_count
 
 
 def generate_dataset():
@@ -139,8 +187,7 @@ def generate_dataset():
 
     # Generate timestamps
     start_time = datetime(2026, 2, 1, 0, 0, 0)
-    timestamps = [start_time + timedelta(seconds=i * SAMPLE_INTERVAL_SECONDS)
-                  for i in range(NUM_SAMPLES)]
+    timestamps = pd.date_range(start=start_time, periods=NUM_SAMPLES, freq=f"{SAMPLE_INTERVAL_SECONDS}s")
 
     # Generate base sensor data
     print(f"\n[1/3] Generating {NUM_SAMPLES} normal sensor readings...")
@@ -150,15 +197,17 @@ def generate_dataset():
     print("[2/3] Injecting anomaly patterns...")
     is_anomaly = inject_anomalies(water_level, gas_level, rng)
 
-    # Build DataFrame
+    # Build DataFrame straight from the final-dtype arrays (rounded in place
+    # so the CSV keeps two decimals)
+    np.round(water_level, 2, out=water_level)
     df = pd.DataFrame({
         "timestamp": timestamps,
-        "water_level_cm": np.round(water_level, 2),
-        "gas_level": gas_level.astype(int),
+        "water_level_cm": water_level,
+        "gas_level": gas_level,
         "is_anomaly": is_anomaly,
     })
 
-    # Save
+    # Save (pandas keeps the shipped CSV's format: bare header, second timestamps)
     os.makedirs(DATA_DIR, exist_ok=True)
     df.to_csv(SENSOR_DATA_CSV, index=False)
 
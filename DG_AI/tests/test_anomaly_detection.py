@@ -0,0 +1,137 @@
+"""Parity tests for the detector's table lookups and batched scoring."""
+
+import itertools
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_model._kernels import FEATURE_NAMES
+from ai_model.anomaly_detection import AnomalyDetector
+from config.settings import (
+    MODEL_PATH,
+    SENSOR_DATA_CSV,
+    RISK_LEVELS,
+    WATER_BLOCKAGE_THRESHOLD,
+    WATER_LEAKAGE_THRESHOLD,
+    GAS_WARNING_THRESHOLD,
+    GAS_DANGER_THRESHOLD,
+)
+
+
+def _reference_risk_type(water_level, gas_level, is_anomaly):
+    """The original if/elif classification the lookup table replaced."""
+    if not is_anomaly:
+        return "NORMAL"
+    if water_level < WATER_BLOCKAGE_THRESHOLD:
+        if gas_level > GAS_WARNING_THRESHOLD:
+            return "FLOOD_RISK"
+        return "BLOCKAGE"
+    elif water_level > WATER_LEAKAGE_THRESHOLD:
+        return "LEAKAGE"
+    elif gas_level > GAS_DANGER_THRESHOLD:
+        return "GAS_HAZARD"
+    elif gas_level > GAS_WARNING_THRESHOLD:
+        return "GAS_HAZARD"
+    return "BLOCKAGE"
+
+
+def _reference_risk_level(risk_score):
+    """The original linear scan over RISK_LEVELS."""
+    for level, config in RISK_LEVELS.items():
+        if config["min_score"] <= risk_score < config["max_score"]:
+            return level
+    return "CRITICAL"
+
+
+@pytest.fixture
+def rule_detector(tmp_path):
+    return AnomalyDetector(model_path=str(tmp_path / "missing.pkl"))
+
+
+def _edges(*thresholds):
+    """Values on, just below and just above each threshold, plus the extremes."""
+    values = {-1.0, 0.0, 4095.0, 500.0}
+    for t in thresholds:
+        values.update((t, math.nextafter(t, -math.inf), math.nextafter(t, math.inf), t - 1, t + 1))
+    return sorted(values)
+
+
+def test_risk_type_table_matches_reference(rule_detector):
+    waters = _edges(WATER_BLOCKAGE_THRESHOLD, WATER_LEAKAGE_THRESHOLD) + list(np.linspace(-1, 200, 41))
+    gases = _edges(GAS_WARNING_THRESHOLD, GAS_DANGER_THRESHOLD) + list(np.linspace(0, 4095, 41))
+    for water, gas, is_anomaly in itertools.product(waters, gases, (True, False)):
+        expected = _reference_risk_type(water, gas, is_anomaly)
+        assert rule_detector._classify_risk_type(water, gas, is_anomaly) == expected
+        # NumPy scalars (batched scoring) must index the table the same way
+        assert rule_detector._classify_risk_type(np.float32(water), np.int16(min(gas, 4095)),
+                                                 np.bool_(is_anomaly)) == _reference_risk_type(
+            np.float32(water), np.int16(min(gas, 4095)), is_anomaly)
+
+
+def test_risk_level_lookup_matches_reference(rule_detector):
+    scores = [-5, 0, 100, 150, float("nan")]
+    for config in RISK_LEVELS.values():
+        for bound in (config["min_score"], config["max_score"]):
+            scores += [bound, math.nextafter(bound, -math.inf), math.nextafter(bound, math.inf)]
+    scores += list(np.linspace(0, 100, 1001))
+    for score in scores:
+        assert rule_detector._get_risk_level(score) == _reference_risk_level(score)
+
+
+RESULT_KEYS = ("is_anomaly", "risk_score", "risk_level", "risk_type")
+
+requires_model = pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="no trained model")
+
+
+@pytest.fixture(scope="module")
+def readings():
+    """A slice of the training data that includes anomaly bursts."""
+    df = pd.read_csv(SENSOR_DATA_CSV, usecols=["water_level_cm", "gas_level", "is_anomaly"])
+    start = int(np.argmax(df["is_anomaly"].to_numpy())) - 50
+    return df.iloc[max(start, 0):max(start, 0) + 400].to_dict("records")
+
+
+def _assert_same(results, expected):
+    assert len(results) == len(expected)
+    for got, want in zip(results, expected):
+        assert {k: got[k] for k in RESULT_KEYS} == {k: want[k] for k in RESULT_KEYS}
+        assert got["raw_score"] == pytest.approx(want["raw_score"], abs=2e-4)
+
+
+@requires_model
+@pytest.mark.parametrize("batch_size", [2, 7, 64, 400])
+def test_predict_batch_matches_predict(readings, batch_size):
+    single = AnomalyDetector()
+    expected = [single.predict(r["water_level_cm"], r["gas_level"]) for r in readings]
+    assert any(r["is_anomaly"] for r in expected)
+
+    batched = AnomalyDetector()
+    results = []
+    for i in range(0, len(readings), batch_size):
+        results += batched.predict_batch(readings[i:i + batch_size])
+    _assert_same(results, expected)
+
+
+@requires_model
+def test_compiled_scorer_matches_scikit_learn(readings):
+    compiled = AnomalyDetector()
+    reference = AnomalyDetector()
+    reference._forest = None  # decision_function through scikit-learn
+    _assert_same(compiled.predict_batch(readings), reference.predict_batch(readings))
+
+
+@requires_model
+def test_score_sign_matches_model_predict(readings):
+    """is_anomaly uses decision_function < 0, which is the cut IsolationForest.predict applies."""
+    detector = AnomalyDetector()
+    features = np.empty((len(readings), len(FEATURE_NAMES)))
+    for i, r in enumerate(readings):
+        detector._build_features(r["water_level_cm"], r["gas_level"], features[i])
+    X = ((features[:, detector._feature_order] - detector._scaler_mean)
+         * detector._scaler_inv_scale).astype(np.float32)
+    raw = detector._model.decision_function(X)
+    np.testing.assert_array_equal(raw < 0, detector._model.predict(X) == -1)
+    np.testing.assert_allclose(detector._score_batch(X), raw, atol=1e-6)
@@ -0,0 +1,160 @@
+"""Regression tests for the simulator's pre-drawn bursts, reading pool and bulk paths."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend import simulator as sim
+from config.settings import SIMULATOR_BURST_DURATION
+
+BURST_MIN = SIMULATOR_BURST_DURATION // 2 + 1  # Counting the reading that starts the burst
+BURST_MAX = SIMULATOR_BURST_DURATION + 1
+
+
+def _in_range(reading):
+    """True if a reading's values lie in the value ranges of the type it is labeled with."""
+    i = sim._NAME_TO_ID[reading["anomaly_type"]]
+    return (sim._ANOM_WATER_LO[i] - 0.01 <= reading["water_level_cm"] <= sim._ANOM_WATER_HI[i] + 0.01
+            and int(sim._ANOM_GAS_LO[i]) <= reading["gas_level"] <= sim._ANOM_GAS_HI[i])
+
+
+def _quiet_simulator(seed=0):
+    """Simulator that never starts a burst on its own."""
+    s = sim.SensorSimulator(interval=0.01)
+    s._rng = np.random.default_rng(seed)
+    s._anomaly_trigger = 0.0
+    return s
+
+
+def _runs(labels):
+    """Lengths of consecutive anomalous runs in a label sequence."""
+    runs, n = [], 0
+    for label in labels:
+        if label != "NORMAL":
+            n += 1
+        elif n:
+            runs.append(n)
+            n = 0
+    if n:
+        runs.append(n)
+    return runs
+
+
+@pytest.mark.parametrize("anomaly_type", ["BLOCKAGE", "LEAKAGE", "GAS_HAZARD", "FLOOD_RISK", None])
+def test_triggered_burst_length_and_values(anomaly_type):
+    s = _quiet_simulator()
+    s.trigger_anomaly(anomaly_type)
+    readings = [dict(s._generate_reading(k * sim.PHASE_STEP)) for k in range(30)]
+
+    burst = [r for r in readings if r["is_anomaly"]]
+    assert BURST_MIN <= len(burst) <= BURST_MAX
+    assert all(r["is_anomaly"] for r in readings[:len(burst)])  # Covers the triggering reading
+    assert len({r["anomaly_type"] for r in burst}) == 1
+    if anomaly_type is not None:
+        assert burst[0]["anomaly_type"] == anomaly_type
+    assert all(_in_range(r) for r in burst)
+
+
+def test_random_burst_lengths_and_values():
+    s = _quiet_simulator()
+    lengths = set()
+    for _ in range(2000):
+        s._start_anomaly_burst()
+        n = s._anomaly_burst_remaining
+        lengths.add(n)
+        assert len(s._burst_water) == len(s._burst_gas) == n
+        i = s._burst_type_id
+        assert i != sim.ANOM_GENERIC
+        assert sim._ANOM_WATER_LO[i] <= min(s._burst_water) and max(s._burst_water) <= sim._ANOM_WATER_HI[i]
+        assert sim._ANOM_GAS_LO[i] <= min(s._burst_gas) and max(s._burst_gas) <= sim._ANOM_GAS_HI[i]
+    assert lengths == set(range(BURST_MIN, BURST_MAX + 1))
+
+
+def test_trigger_mid_burst_never_mislabels_values():
+    for seed in range(20):
+        s = _quiet_simulator(seed)
+        s.trigger_anomaly("LEAKAGE")
+        readings = []
+        for k in range(40):
+            if k == 3:
+                s.trigger_anomaly("GAS_HAZARD")
+            readings.append(dict(s._generate_reading(k * sim.PHASE_STEP)))
+
+        anomalous = [r for r in readings if r["is_anomaly"]]
+        assert all(_in_range(r) for r in anomalous)
+        types = [r["anomaly_type"] for r in anomalous]
+        assert types[0] == "LEAKAGE" and types[-1] == "GAS_HAZARD"
+        assert types == sorted(types, key=["LEAKAGE", "GAS_HAZARD"].index)  # No interleaving
+        assert _runs([r["anomaly_type"] for r in readings]) == [len(anomalous)]  # Back to back
+
+
+def test_stats_report_active_burst_type():
+    s = _quiet_simulator()
+    s.trigger_anomaly("FLOOD_RISK")
+    assert s.stats["current_anomaly_type"] == "FLOOD_RISK"
+    s._generate_reading(0.0)
+    s.trigger_anomaly("BLOCKAGE")
+    assert s.stats["current_anomaly_type"] == "FLOOD_RISK"  # Pending selection waits its turn
+
+
+def test_reading_pool_recycles_records_round_robin():
+    s = _quiet_simulator()
+    first = s._generate_reading(0.0)
+    snapshot = dict(first)
+    for k in range(1, sim.READING_POOL_SIZE):
+        assert s._generate_reading(k * sim.PHASE_STEP) is not first
+    assert dict(first) == snapshot  # Untouched until the pool wraps
+    assert s._generate_reading(0.0) is first
+    assert set(snapshot) == set(sim.READING_FIELDS)
+
+
+def test_recent_matches_generated_readings():
+    s = _quiet_simulator()
+    readings = [dict(s._generate_reading(k * sim.PHASE_STEP)) for k in range(10)]
+    recent = s.recent(4)
+    assert len(recent) == 4
+    np.testing.assert_allclose(recent["water"], [r["water_level_cm"] for r in readings[-4:]], rtol=1e-6)
+    assert recent["gas"].tolist() == [r["gas_level"] for r in readings[-4:]]
+
+
+def test_generate_bulk_shapes_and_ranges():
+    s = sim.SensorSimulator(interval=2.0, anomaly_rate=0.5)
+    s._rng = np.random.default_rng(2)
+    out = s.generate_bulk(20000, start_ts=1000.0)
+
+    assert out.dtype == sim.READING_DTYPE and len(out) == 20000
+    np.testing.assert_allclose(out["ts"][:3], [1000.0, 1002.0, 1004.0])
+
+    normal = out[out["is_anom"] == 0]
+    assert (normal["type_id"] == sim.ANOM_GENERIC).all()
+    assert normal["water"].min() >= 8.0 and normal["water"].max() <= 85.0
+
+    anomalous = out[out["is_anom"] == 1]
+    assert len(anomalous) > 0
+    t = anomalous["type_id"]
+    assert (t < sim.ANOM_GENERIC).all()
+    assert (anomalous["water"] >= sim._ANOM_WATER_LO[t] - 0.01).all()
+    assert (anomalous["water"] <= sim._ANOM_WATER_HI[t] + 0.01).all()
+    assert (anomalous["gas"] >= sim._ANOM_GAS_LO[t].astype(int)).all()
+    assert (anomalous["gas"] <= sim._ANOM_GAS_HI[t]).all()
+
+    runs = _runs(np.where(out["is_anom"] == 1, "A", "NORMAL").tolist())
+    assert min(runs) >= BURST_MIN
+
+
+def test_async_simulator_produces_readings():
+    async def run():
+        s = sim.AsyncSensorSimulator(interval=0.005)
+        s.start()
+        await asyncio.sleep(0.1)
+        s.stop()
+        await asyncio.sleep(0.02)
+        return s
+
+    s = asyncio.run(run())
+    count = s.data_queue.qsize()
+    assert count >= 5
+    assert s.stats["readings"] == count
+    readings = s.data_queue.drain(count)
+    assert all(set(r.keys()) == set(sim.READING_FIELDS) for r in readings)